@@ -5,17 +5,28 @@ from supabase import create_client
 import pandas as pd
 
 from components import login
-from components import vehicle_form
-from components import predictions
-from components import llm_analysis
-from components import update
 
 load_dotenv()
 
-supabase = create_client(
-    os.getenv('SUPABASE_URL'),
-    os.getenv('SUPABASE_KEY')
-)
+# Who may open the Performance page; nobody when unset
+ADMIN_EMAILS = {email.strip() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
+@st.cache_resource(show_spinner=False)
+def get_supabase_client():
+    return create_client(
+        os.getenv('SUPABASE_URL'),
+        os.getenv('SUPABASE_KEY')
+    )
+
+supabase = get_supabase_client()
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server():
+    # Serves /metrics when METRICS_PORT is set; core.tracing only records spans on its own
+    from core import tracing
+    return tracing.start_metrics_server()
+
+start_metrics_server()
 
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
@@ -141,6 +152,10 @@ def show_home_page():
     st.markdown("</div>", unsafe_allow_html=True)
 
 
+def is_admin() -> bool:
+    return getattr(st.session_state.user, "email", None) in ADMIN_EMAILS
+
+
 def render_sidebar_navigation():
     """Renders sidebar navigation based on authentication status."""
     with st.sidebar:
@@ -161,12 +176,18 @@ def render_sidebar_navigation():
             if st.button("Predictions"):
                 st.session_state.current_page = "predictions"
                 st.experimental_rerun()
+            if st.button("Schedule"):
+                st.session_state.current_page = "scheduler"
+                st.experimental_rerun()
             if st.button("Analysis"):
                 st.session_state.current_page = "llm_analysis"
                 st.experimental_rerun()
             if st.button("Update"):
                 st.session_state.current_page = "update"
                 st.experimental_rerun()
+            if is_admin() and st.button("Performance"):
+                st.session_state.current_page = "performance"
+                st.experimental_rerun()
             if st.button("Logout"):
                 st.session_state.authenticated = False
                 st.session_state.user = None
@@ -190,14 +211,25 @@ def main():
         else:
             st.warning("Please log in to continue.")
     else:
+        # Pages are imported on first use so Home and Login don't pay for LightGBM and LangChain
         if st.session_state.current_page == "vehicle_form":
+            from components import vehicle_form
             vehicle_form.show_vehicle_form(supabase)
         elif st.session_state.current_page == "predictions":
+            from components import predictions
             predictions.show_predictions(supabase)
+        elif st.session_state.current_page == "scheduler":
+            from components import scheduler
+            scheduler.show_scheduler(supabase)
         elif st.session_state.current_page == "llm_analysis":
+            from components import llm_analysis
             llm_analysis.show_llm_analysis(supabase)
         elif st.session_state.current_page == "update":
+            from components import update
             update.show_vehicle_update_form(supabase)
+        elif st.session_state.current_page == "performance" and is_admin():
+            from components import performance
+            performance.show_performance(supabase)
 
 if __name__ == "__main__":
     main()
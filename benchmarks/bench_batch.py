@@ -0,0 +1,53 @@
+"""Throughput and peak memory of core.batch.score_file per worker count.
+
+Builds a telemetry export of the requested size by repeating
+model/fleet_train_imputed.csv, then scores it to a temporary file. Peak
+RSS is the process high-water mark so far (tracemalloc would slow the
+parent down too much to time it). Run from the repository root:
+    python -m benchmarks.bench_batch --model lgbm.pkl --rows 1000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import resource
+import tempfile
+
+import pandas as pd
+
+from core.batch import score_file
+
+
+def make_export(path: str, rows: int):
+    data = pd.read_csv("model/fleet_train_imputed.csv")
+    data.head(0).to_csv(path, index=False)
+    for start in range(0, rows, len(data)):
+        data.head(rows - start).to_csv(path, mode="a", header=False, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="lgbm.pkl")
+    parser.add_argument("--scaler", default="scaler.pkl")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "telemetry.csv")
+        make_export(source, args.rows)
+        if args.format == "parquet":
+            parquet = os.path.join(tmp, "telemetry.parquet")
+            pd.read_csv(source).to_parquet(parquet, index=False, row_group_size=100_000)
+            source = parquet
+        print(f"{args.rows} rows, {os.path.getsize(source) / 2**20:.0f} MiB {args.format}")
+
+        print(f"{'workers':>7} {'seconds':>8} {'rows/s':>10} {'parent peak MiB':>16} {'worker peak MiB':>16}")
+        for workers in sorted(set(args.workers)):
+            stats = score_file(source, os.path.join(tmp, f"scores.{args.format}"), args.model, args.scaler, workers)
+            parent = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+            worker = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 2**10
+            print(f"{workers:>7} {stats['seconds']:>8.1f} {stats['rows_per_s']:>10.0f} {parent:>16.0f} {worker:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
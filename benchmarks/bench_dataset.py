@@ -0,0 +1,85 @@
+"""Load time and memory of telemetry read from CSV versus the core.dataset Parquet layout.
+
+Builds an export of the requested size by repeating
+model/fleet_train_imputed.csv, converts it with core.dataset, then loads it
+each way in a fresh process so every peak RSS is its own. "model inputs"
+is what core.train reads; the filtered read keeps one Region. Run from the
+repository root:
+    python -m benchmarks.bench_dataset --rows 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_batch import make_export
+from core import dataset
+
+VARIANTS = {
+    "csv, all columns": lambda csv, ds: pd.read_csv(csv),
+    "csv, model inputs": lambda csv, ds: pd.read_csv(csv, usecols=dataset.MODEL_INPUT_COLUMNS),
+    "parquet, all columns": lambda csv, ds: dataset.load(ds),
+    "parquet, model inputs": lambda csv, ds: dataset.load(ds, dataset.MODEL_INPUT_COLUMNS),
+    "parquet, model inputs, Region=2": lambda csv, ds: dataset.load(
+        ds, dataset.MODEL_INPUT_COLUMNS, dataset.make_filter(regions=[2])),
+}
+
+
+def _peak_mib() -> float:
+    # ru_maxrss keeps the forking parent's high-water mark across exec; VmHWM starts afresh
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 2**10
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+def run_variant(name: str, csv: str, ds: str):
+    import pyarrow.dataset  # noqa: F401  imported before the baseline, like pandas
+
+    baseline = _peak_mib()
+    start = time.perf_counter()
+    frame = VARIANTS[name](csv, ds)
+    seconds = time.perf_counter() - start
+    print(json.dumps({'rows': len(frame), 'seconds': seconds, 'peak_mib': _peak_mib() - baseline,
+                      'frame_mib': frame.memory_usage(deep=True).sum() / 2**20}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--variant", help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    parser.add_argument("--dataset", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.variant:
+        run_variant(args.variant, args.csv, args.dataset)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv, ds = os.path.join(tmp, "telemetry.csv"), os.path.join(tmp, "telemetry")
+        make_export(csv, args.rows)
+        start = time.perf_counter()
+        dataset.convert(csv, ds)
+        parquet_bytes = sum(os.path.getsize(os.path.join(root, name))
+                            for root, _, names in os.walk(ds) for name in names)
+        print(f"{args.rows} rows: CSV {os.path.getsize(csv) / 2**20:.0f} MiB, "
+              f"dataset {parquet_bytes / 2**20:.0f} MiB, converted in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'read':<32} {'rows':>9} {'seconds':>8} {'peak MiB':>9} {'frame MiB':>10}")
+        for name in VARIANTS:
+            output = subprocess.run([sys.executable, "-m", "benchmarks.bench_dataset", "--variant", name,
+                                     "--csv", csv, "--dataset", ds], check=True, capture_output=True, text=True)
+            result = json.loads(output.stdout)
+            print(f"{name:<32} {result['rows']:>9} {result['seconds']:>8.2f} {result['peak_mib']:>9.0f} "
+                  f"{result['frame_mib']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Microbenchmark: per-feature MinMaxScaler loop vs the fused FeatureTransform.
+
+Run from the repository root:
+    python -m benchmarks.bench_features --rows 1 100 10000
+"""
+import argparse
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.features import MODEL_FEATURES, build_feature_frame, compile_scalers
+
+
+def load_fleet(rows: int) -> pd.DataFrame:
+    df = pd.read_csv("model/fleet_train_imputed.csv")
+    reps = -(-rows // len(df))
+    return pd.concat([df] * reps, ignore_index=True).head(rows)
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scaler", default="scaler.pkl")
+    args = parser.parse_args()
+
+    with open(args.scaler, "rb") as f:
+        scaler = pickle.load(f)
+    transform = compile_scalers(scaler, MODEL_FEATURES)
+
+    print(f"{'rows':>8} {'scaler loop (ms)':>17} {'fused (ms)':>11} {'speedup':>8}  identical")
+    for rows in args.rows:
+        df = load_fleet(rows)
+        out = np.empty((rows, len(MODEL_FEATURES)), dtype=np.float64)
+
+        reference = build_feature_frame(df, scaler, MODEL_FEATURES).to_numpy(dtype=np.float64)
+        fused = transform.transform(df, out=out)
+        identical = np.array_equal(reference.view(np.uint64), fused.view(np.uint64))
+
+        legacy_s = best_of(lambda: build_feature_frame(df, scaler, MODEL_FEATURES), args.repeat)
+        fused_s = best_of(lambda: transform.transform(df, out=out), args.repeat)
+        print(f"{rows:>8} {legacy_s * 1e3:>17.3f} {fused_s * 1e3:>11.3f} {legacy_s / fused_s:>7.1f}x  {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Import cost of the unauthenticated pages before and after lazy page loading.
+
+Each set of modules is imported in a fresh interpreter so nothing is warm.
+Run from the repository root:
+    python -m benchmarks.bench_imports --repeat 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# What app.py imported up front before pages were loaded lazily
+EAGER = ["streamlit", "supabase", "components.login", "components.vehicle_form",
+         "components.predictions", "components.llm_analysis", "components.update"]
+# What Home/Login need now
+LAZY = ["streamlit", "supabase", "components.login"]
+# Work moved to the first prediction: the LightGBM import and model unpickling
+FIRST_PREDICTION = ["components.predictions", "lightgbm"]
+
+SNIPPET = """
+import time, importlib, warnings
+warnings.simplefilter("ignore")
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+print(time.perf_counter() - start)
+"""
+
+
+def time_imports(modules, repeat):
+    timings = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", SNIPPET.format(modules=modules)],
+                             capture_output=True, text=True, check=True)
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    eager = time_imports(EAGER, args.repeat)
+    lazy = time_imports(LAZY, args.repeat)
+    deferred = time_imports(FIRST_PREDICTION, args.repeat)
+    print(f"Home/Login imports, all pages eager : {eager * 1e3:8.1f} ms")
+    print(f"Home/Login imports, pages lazy      : {lazy * 1e3:8.1f} ms")
+    print(f"Saved before first paint            : {(eager - lazy) * 1e3:8.1f} ms")
+    print(f"Predictions page imports, cold      : {deferred * 1e3:8.1f} ms (plus model unpickling)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Generations and wall time for concurrent manual questions: langchain Ollama vs core.llm_gateway.
+
+Each simulated session asks a question and then clicks "Stream Response",
+as on the manual chat page; several sessions share the same questions.
+Both clients talk to benchmarks/ollama_stub, so only client behaviour is
+measured. Run from the repository root:
+    python -m benchmarks.bench_llm_gateway --sessions 8 --questions 3
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_community.llms import Ollama
+
+from benchmarks.ollama_stub import start_stub
+from core.llm_gateway import LLMGateway
+
+MODEL = "llama2"
+
+
+def run_sessions(ask, sessions: int, questions: int):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(lambda s: ask(f"question {s % questions}"), range(sessions)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    server, url = start_stub(token_delay=args.token_delay)
+
+    model = Ollama(model=MODEL, temperature=0.3, num_ctx=2048, base_url=url)
+
+    def ask_langchain(question):
+        answer = model.invoke(question)
+        streamed = "".join(model.stream(question))
+        return answer, streamed
+
+    elapsed = run_sessions(ask_langchain, args.sessions, args.questions)
+    print(f"{'langchain Ollama':>18}: {server.stats['generations']:>3} generations, {elapsed:.2f}s")
+
+    server.stats["generations"] = 0
+    gateway = LLMGateway(url)
+
+    def ask_gateway(question):
+        key = ("manual", question, MODEL, 0.3)
+        answer = gateway.generate(question, key, MODEL)
+        streamed = "".join(gateway.stream(question, key, MODEL))
+        return answer, streamed
+
+    elapsed = run_sessions(ask_gateway, args.sessions, args.questions)
+    print(f"{'llm_gateway':>18}: {server.stats['generations']:>3} generations, {elapsed:.2f}s, {gateway.stats}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
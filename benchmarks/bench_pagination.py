@@ -0,0 +1,124 @@
+"""Time-to-first-card and peak memory of the paged scorer as the fleet grows.
+
+An in-memory stand-in for the PostgREST query builder serves the vehicles,
+so only the client-side cost is measured. Run from the repository root:
+    python -m benchmarks.bench_pagination --model lgbm.pkl --fleet 50 500 5000 50000
+"""
+import argparse
+import bisect
+import time
+import tracemalloc
+
+import pandas as pd
+
+from core import registry, vehicles
+from core.features import rename_mapping
+from core.scoring import score_fleet, stream_top_predictions
+
+TOP_N = 30
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    """Just enough of the query builder for vehicles.fetch_page: one user, keyset on vehicle_id."""
+
+    def __init__(self, table):
+        self.table, self.columns, self.after, self.max_rows = table, None, None, None
+
+    def select(self, columns):
+        self.columns = columns.split(",")
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def gt(self, column, value):
+        self.after = value
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, n):
+        self.max_rows = n
+        return self
+
+    def execute(self):
+        start = 0 if self.after is None else bisect.bisect_right(self.table.ids, self.after)
+        rows = self.table.rows[start:start + self.max_rows]
+        return _Response([{c: r.get(c) for c in self.columns} for r in rows])
+
+
+class InMemorySupabase:
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda r: r["vehicle_id"])
+        self.ids = [r["vehicle_id"] for r in self.rows]
+
+    def table(self, name):
+        return _Query(self)
+
+
+def make_fleet(size: int):
+    inverse = {v: k for k, v in rename_mapping.items()}
+    data = pd.read_csv("model/fleet_train_imputed.csv").rename(columns=inverse)
+    data = pd.concat([data] * (-(-size // len(data))), ignore_index=True).head(size)
+    records = data[vehicles.TELEMETRY_COLUMNS].to_dict("records")
+    for i, record in enumerate(records):
+        record.update(user_id="bench", vehicle_id=f"V{i:06d}", brand="brand", model_name="model",
+                      last_serviced_date="2024-02-23T00:00:00", last_modified="2025-01-01T00:00:00",
+                      manual_link=None, score=None)
+    return records
+
+
+def measure(run):
+    vehicles.invalidate("bench")
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = run()
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, total, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="lgbm.pkl")
+    parser.add_argument("--scaler", default="scaler.pkl")
+    parser.add_argument("--fleet", type=int, nargs="+", default=[50, 500, 5_000, 50_000])
+    args = parser.parse_args()
+
+    bundle = registry.get_model(args.model, args.scaler)
+
+    def whole_fleet(supabase):
+        def run():
+            start = time.perf_counter()
+            fleet = vehicles.fetch_fleet(supabase, "bench").rename(columns=rename_mapping)
+            predictions, _ = score_fleet(fleet, bundle, bundle.transform)
+            predictions.sort_values("prediction_score", ascending=False)
+            return time.perf_counter() - start
+        return run
+
+    def paged(supabase):
+        def run():
+            start, first = time.perf_counter(), None
+            for _ in stream_top_predictions(vehicles.iter_pages(supabase, "bench"), bundle, bundle.transform, TOP_N):
+                first = first or time.perf_counter() - start
+            return first
+        return run
+
+    print(f"{'fleet':>7} | {'whole fleet: first card':>23} {'peak MiB':>9} | {'paged: first card':>17} {'total':>9} {'peak MiB':>9}")
+    for size in args.fleet:
+        supabase = InMemorySupabase(make_fleet(size))
+        whole_first, _, whole_peak = measure(whole_fleet(supabase))
+        paged_first, paged_total, paged_peak = measure(paged(supabase))
+        print(f"{size:>7} | {whole_first * 1e3:>21.1f}ms {whole_peak:>9.1f} | "
+              f"{paged_first * 1e3:>15.1f}ms {paged_total * 1e3:>7.0f}ms {paged_peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
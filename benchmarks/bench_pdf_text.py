@@ -0,0 +1,64 @@
+"""Pages/s of manual text extraction, and how soon the first chunk is ready for indexing.
+
+Compares the old extract_text_from_pdf (get_text twice per page, whole
+document joined before anything else happens) with core.pdf_text.iter_pages
+serially and across a process pool. The pool lives for the process, so the
+first call of each worker count (cold) also pays for starting its workers;
+the other columns are the best of the warm repeats. Run from the repository root:
+    python -m benchmarks.bench_pdf_text --pdf RAG_LLM/car_recored.pdf --workers 1 2 4
+"""
+import argparse
+import os
+import time
+
+import fitz  # PyMuPDF
+
+from core.manual_index import iter_chunks
+from core.pdf_text import iter_pages
+
+
+def old_extract(path):
+    with fitz.open(path) as doc:
+        return "\n".join([page.get_text("text") for page in doc if page.get_text("text").strip()])
+
+
+def best_of(fn, repeat):
+    """The best (seconds, first) of repeat calls, and the first call's."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        first = fn()
+        timings.append((time.perf_counter() - start, first))
+    return min(timings[1:] or timings), timings[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", default="RAG_LLM/car_recored.pdf")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with fitz.open(args.pdf) as doc:
+        pages = len(doc)
+    print(f"{args.pdf}: {pages} pages, {os.path.getsize(args.pdf) / 2**20:.1f} MiB")
+    print(f"{'extractor':>18} {'seconds':>8} {'pages/s':>8} {'first chunk':>12} {'cold first':>11}")
+
+    (total, _), (cold, _) = best_of(lambda: old_extract(args.pdf), args.repeat)
+    print(f"{'old (twice/page)':>18} {total:>8.2f} {pages / total:>8.0f} {total * 1e3:>10.0f}ms "
+          f"{cold * 1e3:>9.0f}ms")
+
+    for workers in sorted(set(args.workers)):
+        def run():
+            start, first = time.perf_counter(), None
+            for _ in iter_chunks(iter_pages(args.pdf, workers)):
+                first = first or time.perf_counter() - start
+            return first
+
+        (total, first), (_, cold) = best_of(run, args.repeat)
+        print(f"{f'iter_pages x{workers}':>18} {total:>8.2f} {pages / total:>8.0f} {first * 1e3:>10.0f}ms "
+              f"{cold * 1e3:>9.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
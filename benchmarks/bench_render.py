@@ -0,0 +1,111 @@
+"""Render time of the vehicle table and prediction cards against fleet size.
+
+Compares the old iterrows/+= string building (one st.markdown and one
+st.button per card) with components.rendering (one st.markdown for all
+cards). Only HTML generation is timed, best of --repeat; the Streamlit
+element count is reported alongside. The cards' maintenance plan (next
+service window and urgency, which the legacy cards lack) is computed once
+per frame and timed on its own. Run from the repository root:
+    python -m benchmarks.bench_render --fleet 100 1000 10000 50000
+"""
+import argparse
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+
+from components.rendering import cards_html, table_html
+from core.maintenance import maintenance_plan
+
+
+def legacy_table(df1):
+    table_html = "<table><thead><tr>"
+    for column in df1.columns:
+        table_html += f"<th>{column}</th>"
+    table_html += "</tr></thead><tbody>"
+    for idx, row in df1.iterrows():
+        table_html += "<tr>"
+        for value in row:
+            table_html += f"<td>{value}</td>"
+        table_html += "</tr>"
+    return table_html + "</tbody></table>"
+
+
+def legacy_cards(predictions_df):
+    cards = []
+    for idx, pred_row in enumerate(predictions_df.itertuples()):
+        failure_types = {
+            "Engine Failure": pred_row.engine_failure,
+            "Overstrain Failure": pred_row.overstrain_failure,
+            "Heat Dissipation Failure": pred_row.heat_dissipation_failure,
+        }
+        highest_failure = max(failure_types, key=failure_types.get)
+
+        def format_failure(name, value):
+            if name == highest_failure:
+                return f'<p class="failure-info red"><b>{name}:</b> {value:.5f}</p>'
+            return f'<p class="failure-info"><b>{name}:</b> {value:.5f}</p>'
+
+        maintenance_warning = ""
+        if pred_row.last_serviced_date:
+            one_year_ago = datetime.date.today() - datetime.timedelta(days=365)
+            if pred_row.last_serviced_date < one_year_ago:
+                maintenance_warning = '<p class="failure-info orange"><b>⚠️ General Maintenance Required</b></p>'
+        cards.append(f"""
+            <div class="vehicle-card">
+                <h4> Vehicle ID: {pred_row.vehicle_id}</h4>
+                {format_failure("Engine Failure", pred_row.engine_failure)}
+                {format_failure("Overstrain Failure", pred_row.overstrain_failure)}
+                {format_failure("Heat Dissipation Failure", pred_row.heat_dissipation_failure)}
+                <p><b>Prev Service Date:</b> {pred_row.last_serviced_date}</p>
+                {maintenance_warning}
+            </div>
+            """)
+    return cards
+
+
+def make_fleet(size, rng):
+    proba = rng.dirichlet(np.ones(4), size=size)
+    today = datetime.date.today()
+    dates = [today - datetime.timedelta(days=int(d)) for d in rng.integers(0, 900, size)]
+    ids = [f"V{i:06d}" for i in range(size)]
+    table = pd.DataFrame({"vehicle_id": ids, "brand": "Tata", "model_name": "Prima", "last_serviced_date": dates})
+    predictions = pd.DataFrame({
+        "vehicle_id": ids, "prediction": proba.argmax(axis=1),
+        "engine_failure": proba[:, 0], "overstrain_failure": proba[:, 1], "heat_dissipation_failure": proba[:, 2],
+        "prediction_score": proba.max(axis=1), "last_serviced_date": dates,
+    }).sort_values("prediction_score", ascending=False)
+    return table, predictions
+
+
+def timed(repeat, fn, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fleet", type=int, nargs="+", default=[100, 1_000, 10_000, 50_000])
+    parser.add_argument("--top", type=int, default=30, help="cards shown by the top-N view")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'fleet':>7} | {'legacy table':>12} {'legacy cards':>12} {'st calls':>8} | "
+          f"{'bulk table':>10} {'plan':>8} {'bulk cards':>10} {'top-N cards':>11} {'st calls':>8}")
+    for size in args.fleet:
+        table, predictions = make_fleet(size, rng)
+        top = predictions.head(args.top)
+        plan, top_plan = maintenance_plan(predictions), maintenance_plan(top)
+        print(f"{size:>7} | {timed(args.repeat, legacy_table, table):>10.1f}ms {timed(args.repeat, legacy_cards, predictions):>10.1f}ms "
+              f"{2 * size + 1:>8} | {timed(args.repeat, table_html, table):>8.1f}ms {timed(args.repeat, maintenance_plan, predictions):>6.1f}ms "
+              f"{timed(args.repeat, cards_html, predictions, plan):>8.1f}ms {timed(args.repeat, cards_html, top, top_plan):>9.2f}ms {4:>8}")
+
+
+if __name__ == "__main__":
+    main()
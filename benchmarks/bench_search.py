@@ -0,0 +1,74 @@
+"""Wall-clock time and test macro-F1 of the hyperparameter searches in core.train.
+
+Compares the notebook's RandomizedSearchCV over LGBMClassifier, core.train's
+randomized search with early stopping, and its successive halving on
+cached bins, on the same train/test split of the training data. Each
+winner is refit on the training split and scored on the test split. Run
+from the repository root:
+    python -m benchmarks.bench_search --workers 4
+"""
+import argparse
+import os
+import time
+
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import RandomizedSearchCV, train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from core import train
+
+
+def notebook_search(xtrain, ytrain, xtest, workers: int):
+    import lightgbm as lgb
+
+    num_class = len(set(ytrain))
+    model = lgb.LGBMClassifier(objective='multiclass', num_class=num_class, boosting_type='gbdt', verbose=-1)
+    search = RandomizedSearchCV(model, train.PARAM_GRID, n_iter=train.N_ITER, scoring='accuracy',
+                                cv=train.CV_FOLDS, random_state=train.SEED, n_jobs=workers)
+    search.fit(xtrain, ytrain)
+    best = lgb.LGBMClassifier(objective='multiclass', num_class=num_class, verbose=-1, **search.best_params_)
+    return best.fit(xtrain, ytrain).predict(xtest)
+
+
+def core_search(search_fn, n_iter: int):
+    def run(xtrain, ytrain, xtest, workers: int):
+        import lightgbm as lgb
+
+        num_class = len(set(ytrain))
+        params, best_iteration, _ = search_fn(xtrain, ytrain, num_class, n_iter, workers)
+        booster = lgb.train({**train.base_params(num_class), **params, 'num_threads': workers},
+                            lgb.Dataset(xtrain, ytrain), num_boost_round=max(best_iteration, 1))
+        return booster.predict(xtest).argmax(axis=1)
+    return run
+
+
+SEARCHES = {
+    "notebook RandomizedSearchCV": notebook_search,
+    "randomized + early stopping": core_search(train.search, train.N_ITER),
+    "successive halving": core_search(train.halving_search, train.HALVING_CANDIDATES),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default="model/fleet_train_imputed.csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    df = train.load_training_data(args.data)
+    features, labels = train.prepare(df, train.fit_scalers(df))
+    y = LabelEncoder().fit_transform(labels)
+    xtrain, xtest, ytrain, ytest = train_test_split(features.to_numpy(), y, test_size=0.2, random_state=train.SEED)
+    print(f"{len(df)} rows, {args.workers} workers")
+
+    print(f"{'search':<30} {'seconds':>8} {'accuracy':>9} {'macro-F1':>9}")
+    for name, run in SEARCHES.items():
+        start = time.perf_counter()
+        pred = run(xtrain, ytrain, xtest, args.workers)
+        seconds = time.perf_counter() - start
+        print(f"{name:<30} {seconds:>8.1f} {accuracy_score(ytest, pred):>9.4f} "
+              f"{f1_score(ytest, pred, average='macro'):>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""p50/p99 latency of CompiledBooster vs native LightGBM predictions.
+
+The native side calls the underlying Booster, so lgbm.pkl may hold a
+fitted LGBMClassifier or a raw Booster.
+
+Run from the repository root:
+    python -m benchmarks.bench_tree_eval --model lgbm.pkl --sizes 1 100 10000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.features import compile_scalers
+from core.registry import load_pickle
+from core.tree_eval import CompiledBooster
+
+
+def latencies(fn, X, repeat):
+    fn(X)  # warm up
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        timings[i] = time.perf_counter() - start
+    return np.percentile(timings, [50, 99]) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="lgbm.pkl")
+    parser.add_argument("--scaler", default="scaler.pkl")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    model = load_pickle(args.model)
+    compiled = CompiledBooster.from_model(model)
+    booster = getattr(model, "_Booster", model)
+
+    def native(X):
+        pred_prob = booster.predict(X)
+        return np.column_stack([1.0 - pred_prob, pred_prob]) if pred_prob.ndim == 1 else pred_prob
+
+    data = pd.read_csv("model/fleet_train_imputed.csv")
+    features = compile_scalers(load_pickle(args.scaler), compiled.feature_name_).transform(data)
+
+    print(f"{'rows':>6} {'native p50':>11} {'native p99':>11} {'numpy p50':>10} {'numpy p99':>10} {'max |diff|':>11}")
+    for size in args.sizes:
+        X = features[np.arange(size) % len(features)]
+        diff = np.abs(compiled.predict_proba(X) - native(X)).max()
+        repeat = max(5, args.repeat if size < 10_000 else args.repeat // 10)
+        native_p50, native_p99 = latencies(native, X, repeat)
+        numpy_p50, numpy_p99 = latencies(compiled.predict_proba, X, repeat)
+        print(f"{size:>6} {native_p50:>9.3f}ms {native_p99:>9.3f}ms {numpy_p50:>8.3f}ms {numpy_p99:>8.3f}ms {diff:>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""A stand-in for the Ollama HTTP API, for exercising the app without a model.
+
+/api/generate streams a canned answer as NDJSON, one word per chunk with a
+configurable delay; /api/embeddings returns a deterministic bag-of-words
+vector of the prompt. GET /stats reports how many generations were served.
+Run from the repository root and point OLLAMA_URL at it:
+    python -m benchmarks.ollama_stub --port 11435 --token-delay 0.02
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+EMBEDDING_SIZE = 256
+
+
+def embed(text: str) -> list:
+    vector = np.zeros(EMBEDDING_SIZE)
+    for word in text.lower().split():
+        vector[int(hashlib.md5(word.encode()).hexdigest()[:8], 16) % EMBEDDING_SIZE] += 1
+    return vector.tolist()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._json(self.server.stats)
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path in ("/api/embeddings", "/api/embed"):
+            with self.server.lock:
+                self.server.stats["embeddings"] += 1
+            if self.path == "/api/embed":
+                inputs = request["input"] if isinstance(request["input"], list) else [request["input"]]
+                self._json({"embeddings": [embed(text) for text in inputs]})
+            else:
+                self._json({"embedding": embed(request["prompt"])})
+            return
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+
+        with self.server.lock:
+            self.server.stats["generations"] += 1
+        words = (f"Stub answer to: {request['prompt'][-200:]}".split() * self.server.tokens)[:self.server.tokens]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in words:
+            time.sleep(self.server.token_delay)
+            self._chunk({"model": request["model"], "response": word + " ", "done": False})
+        self._chunk({"model": request["model"], "response": "", "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, body: dict):
+        line = json.dumps(body).encode() + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+
+def start_stub(port: int = 0, token_delay: float = 0.01, tokens: int = 50):
+    """Starts the stub on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    server.token_delay, server.tokens = token_delay, tokens
+    server.lock = threading.Lock()
+    server.stats = {"generations": 0, "embeddings": 0}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=50)
+    args = parser.parse_args()
+    server, url = start_stub(args.port, args.token_delay, args.tokens)
+    print(f"Ollama stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
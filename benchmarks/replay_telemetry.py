@@ -0,0 +1,71 @@
+"""Replays a telemetry CSV through core.telemetry.TelemetryService at a chosen rate.
+
+Readings are sent in Measurement_timestamp order, batch_size at a time,
+paced to --rate readings per second (0 sends as fast as the service takes
+them). Reports ingest throughput, how many vehicles were rescored versus
+left alone by the drift check, and batch latency from submit to processed.
+Run from the repository root:
+    python -m benchmarks.replay_telemetry model/fleet_train.csv --model lgbm.pkl --rate 5000
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import registry
+from core.dataset import TIMESTAMP_FORMAT
+from core.telemetry import DRIFT_THRESHOLD, WINDOW_SIZE, TelemetryService
+
+
+def load_readings(path: str, repeat: int = 1) -> pd.DataFrame:
+    """The CSV in time order; repeat > 1 appends copies shifted past the end, as if the fleet kept driving."""
+    readings = pd.read_csv(path)
+    readings['Measurement_timestamp'] = pd.to_datetime(readings['Measurement_timestamp'], format=TIMESTAMP_FORMAT)
+    readings = readings.sort_values('Measurement_timestamp', kind='stable')
+    span = readings['Measurement_timestamp'].max() - readings['Measurement_timestamp'].min() + pd.Timedelta(seconds=1)
+    copies = [readings.assign(Measurement_timestamp=readings['Measurement_timestamp'] + span * i) for i in range(repeat)]
+    return pd.concat(copies, ignore_index=True)
+
+
+async def replay(service: TelemetryService, readings: pd.DataFrame, batch_size: int, rate: float) -> float:
+    consumer = asyncio.create_task(service.run())
+    start = time.perf_counter()
+    for sent in range(0, len(readings), batch_size):
+        if rate:
+            await asyncio.sleep(max(0.0, start + sent / rate - time.perf_counter()))
+        await service.submit(readings.iloc[sent:sent + batch_size])
+    await service.close()
+    await consumer
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv", nargs="?", default="model/fleet_train.csv")
+    parser.add_argument("--model", default=registry.MODEL_PATH)
+    parser.add_argument("--scaler", default=registry.SCALER_PATH)
+    parser.add_argument("--rate", type=float, default=0, help="readings per second, 0 for unpaced")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=1, help="replay the file this many times back to back")
+    parser.add_argument("--window", type=int, default=WINDOW_SIZE)
+    parser.add_argument("--drift", type=float, default=DRIFT_THRESHOLD)
+    args = parser.parse_args()
+
+    readings = load_readings(args.csv, args.repeat)
+    service = TelemetryService(registry.get_model(args.model, args.scaler), args.window, args.drift)
+    seconds = asyncio.run(replay(service, readings, args.batch_size, args.rate))
+
+    stats = service.stats
+    latencies = np.array(service.latencies) * 1000
+    print(f"{stats['readings']} readings of {len(service.predictions)} vehicles in {seconds:.2f}s "
+          f"({stats['readings'] / seconds:.0f} readings/s, target {args.rate or 'unpaced'})")
+    print(f"rescored {stats['rescored']} times, unchanged {stats['unchanged']}, "
+          f"stale {stats['stale']}, invalid {stats['invalid']}")
+    print(f"batch latency ms: p50 {np.percentile(latencies, 50):.1f}, p99 {np.percentile(latencies, 99):.1f}, "
+          f"max {latencies.max():.1f}")
+
+
+if __name__ == "__main__":
+    main()
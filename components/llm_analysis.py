@@ -1,13 +1,17 @@
 import streamlit as st
-import fitz  # PyMuPDF
-import os
-import tempfile
 from supabase import Client
-from langchain_community.llms import Ollama
+from langchain_community.embeddings import OllamaEmbeddings
 from langchain.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+
+from core import pdf_text, tracing, vehicles
+from core.briefings import get_briefing_queue
+from core.llm_gateway import OLLAMA_URL, get_gateway
+from core.manual_cache import fetch_manual
+from core.manual_index import build_context
+from core.semantic_cache import get_semantic_cache
 
 current_vehicle_data = st.session_state.get("current_vehicle_data")
+@tracing.traced("analysis.page")
 def show_llm_analysis(supabase: Client):
     #st.set_page_config(page_title="Vehicle Manual Chatbot", page_icon="🚗", layout="wide")
     st.title("Vehicle Manual Chatbot")
@@ -15,58 +19,25 @@ def show_llm_analysis(supabase: Client):
     st.write("------------------------------------------------------------------------")
 
     # Function to fetch the manual link using vehicle_id
+    @tracing.traced("analysis.fetch_vehicle")
     def fetch_manual_link(vehicle_id):
-        response = supabase.table('vehicles') \
-                        .select('manual_link') \
-                        .eq('vehicle_id', vehicle_id) \
-                        .execute()
-        if response.data and len(response.data) > 0:
-            return response.data[0]['manual_link']
+        vehicle = vehicles.get_vehicle(supabase, st.session_state.user.id, vehicle_id)
+        if vehicle:
+            return vehicle['manual_link']
         return None
-    # Function to download PDF from Supabase storage
-    import requests
-
+    # Function to get the PDF from the local manual cache, downloading it from Supabase storage on a miss
     def download_pdf(manual_link):
         if not manual_link:
             return None
 
         try:
-            # Extract file name and remove invalid characters
-            file_name = manual_link.split("/")[-1].split("?")[0]  # Remove query params if present
-           # st.write(f"Cleaned File Name: {file_name}")
-
-            temp_dir = r"D:\Projects\MainEL\mainel\manual_folder"
-            temp_path = os.path.join(temp_dir, file_name)
-           # st.write(f"Saving File To: {temp_path}")
-
-            # Get the public URL
-            public_link = supabase.storage.from_("manuals").get_public_url(f"manuals/{file_name}").split("?")[0]
-            #st.write(f"Public URL: {public_link}")
-
-            # Fetch the file
-            response = requests.get(public_link)
-
-            if response.status_code == 200:
-                with open(temp_path, 'wb') as f:
-                    f.write(response.content)
-                return temp_path
-            else:
-                st.error(f"Failed to download file. HTTP {response.status_code}")
-                return None
+            with tracing.span("analysis.download"):
+                return fetch_manual(supabase, manual_link)
 
         except Exception as e:
             st.error(f"Error downloading manual: {e}")
             return None
 
-    # Function to extract text from a PDF
-    def extract_text_from_pdf(file_path):
-        try:
-            with fitz.open(file_path) as doc:
-                return "\n".join([page.get_text("text") for page in doc if page.get_text("text").strip()])
-        except Exception as e:
-            st.error(f"Error reading PDF: {e}")
-            return ""
-
     # Fetch vehicle_id from session state
     vehicle_id = st.session_state.get("current_vehicle")
     vehicle_id = next(iter(vehicle_id), None)
@@ -76,29 +47,50 @@ def show_llm_analysis(supabase: Client):
         
         #st.write(f"Fetching manual for Vehicle ID: {vehicle_id}")
 
+        # Pre-generated in the background for the riskiest vehicles after scoring
+        briefing = get_briefing_queue().store.get(st.session_state.user.id, vehicle_id)
+        if briefing:
+            with st.expander(f"Maintenance briefing: {briefing['failure_type']}", expanded=True):
+                st.write(briefing['briefing'])
+
         manual_link = fetch_manual_link(vehicle_id)
         if manual_link:
-            pdf_path = download_pdf(manual_link)
+            manual = download_pdf(manual_link)
 
-            if pdf_path:
+            if manual:
                 st.success("Vehicle manual downloaded successfully!")
 
-                # Extract text from the downloaded PDF
-                full_manual_text = extract_text_from_pdf(pdf_path)
+                # Load LLM model
+                MODEL = "llama2"
+                TEMPERATURE = 0.3
 
-                if not full_manual_text:
-                    st.warning("No text extracted from the PDF. Please try another file.")
-                else:
-                    # Load LLM model
-                    MODEL = "llama2"
+                @st.cache_resource
+                def load_embeddings():
+                    return OllamaEmbeddings(model=MODEL, base_url=OLLAMA_URL)
 
-                    @st.cache_resource
-                    def load_model():
-                        return Ollama(model=MODEL, temperature=0.3, num_ctx=2048, base_url="http://localhost:11434")
 
+                # One pooled client for all sessions; an answer is generated once per
+                # (manual, question, model, temperature) and shared by both buttons
+                gateway = get_gateway()
+                embeddings = load_embeddings()
 
-                    model = load_model()
+                # Only the chunks relevant to a question go into the prompt; the manual is
+                # embedded once, while its pages are still being parsed, and kept on disk
+                # Parsing and embedding interleave while an index is built, so each is timed on its own
+                def iter_pages(path):
+                    return tracing.traced_iter("analysis.pdf_parse", pdf_text.iter_pages(path))
 
+                try:
+                    with st.spinner("Indexing the manual..."), tracing.span("analysis.index"):
+                        manual_index = manual.index(tracing.traced("analysis.embed_manual")(embeddings.embed_documents),
+                                                    MODEL, iter_pages)
+                except Exception as e:
+                    st.error(f"Error reading PDF: {e}")
+                    manual_index = None
+
+                if manual_index is not None and not manual_index.chunks:
+                    st.warning("No text extracted from the PDF. Please try another file.")
+                elif manual_index is not None:
                     # Define prompt
                     template = """
                     Answer the question based on the context below. If you can't 
@@ -108,19 +100,50 @@ def show_llm_analysis(supabase: Client):
                     Question: {question}
                     """
                     prompt = PromptTemplate.from_template(template)
-                    parser = StrOutputParser()
 
                     # User query input
                     question = st.text_input("Ask a question about your vehicle:")
 
+                    # Near-duplicates of earlier questions about this manual reuse their answer;
+                    # a question is embedded and looked up once per session, not on every rerun
+                    semantic_cache = get_semantic_cache()
+                    answer_scope = (manual.digest, MODEL, TEMPERATURE)
+                    asked = st.session_state.setdefault("asked_questions", {})
+                    if question and (answer_scope, question) not in asked:
+                        with tracing.span("analysis.embed_question"):
+                            question_vector = embeddings.embed_query(question)
+                        with tracing.span("analysis.semantic_cache"):
+                            asked[(answer_scope, question)] = (question_vector,
+                                                               semantic_cache.lookup(answer_scope, question_vector))
+                    question_vector, cached = asked.get((answer_scope, question), (None, None))
+
+                    with tracing.span("analysis.retrieve"):
+                        context = build_context(manual_index, question_vector) if question and not cached else None
+                    answer_key = (manual.digest, question, MODEL, TEMPERATURE)
+
                     if question:
-                        response = model.invoke(prompt.format(context=full_manual_text, question=question))
+                        if cached:
+                            response, similar_question, similarity = cached
+                        else:
+                            with tracing.span("analysis.ollama_generate"):
+                                response = gateway.generate(prompt.format(context=context, question=question),
+                                                            answer_key, MODEL, temperature=TEMPERATURE)
+                            semantic_cache.add(answer_scope, question, question_vector, response)
                         st.write("### Answer:")
                         st.write(response)
+                        if cached:
+                            stats = semantic_cache.stats()
+                            st.caption(f"Answered from the earlier question \"{similar_question}\" "
+                                       f"(similarity {similarity:.2f}; cache hit rate {stats['hit_rate']:.0%})")
 
                     # Streaming response option
                     if st.button("Stream Response"):
-                        st.write_stream(model.stream(prompt.format(context=full_manual_text, question=question)))
+                        if cached:
+                            st.write_stream(iter([response]))
+                        else:
+                            st.write_stream(tracing.traced_iter("analysis.ollama_stream", gateway.stream(
+                                prompt.format(context=context, question=question), answer_key,
+                                MODEL, temperature=TEMPERATURE)))
             else:
                 st.error("Failed to download the manual.")
         else:
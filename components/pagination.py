@@ -0,0 +1,30 @@
+import streamlit as st
+import pandas as pd
+
+from core import vehicles
+
+TABLE_PAGE_SIZE = 50
+
+def get_table_page(supabase, key: str, page_size: int = TABLE_PAGE_SIZE) -> pd.DataFrame:
+    """Returns the page of the user's fleet a paged table is currently showing."""
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    page = vehicles.fetch_page(supabase, st.session_state.user.id, after=cursors[-1], limit=page_size)
+    # The page can empty out after deletes; step back to the last one with vehicles
+    while page.empty and len(cursors) > 1:
+        cursors.pop()
+        page = vehicles.fetch_page(supabase, st.session_state.user.id, after=cursors[-1], limit=page_size)
+    return page
+
+def show_page_controls(key: str, page: pd.DataFrame, page_size: int = TABLE_PAGE_SIZE):
+    cursors = st.session_state[f"{key}_cursors"]
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if len(cursors) > 1 and st.button("◀ Previous", key=f"{key}_prev"):
+            cursors.pop()
+            st.experimental_rerun()
+    with col2:
+        st.caption(f"Page {len(cursors)}")
+    with col3:
+        if len(page) == page_size and st.button("Next ▶", key=f"{key}_next"):
+            cursors.append(page["vehicle_id"].iloc[-1])
+            st.experimental_rerun()
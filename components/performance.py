@@ -0,0 +1,44 @@
+import streamlit as st
+import pandas as pd
+from supabase import Client
+
+from core import tracing
+
+STAT_COLUMNS = ['count', 'p50', 'p95', 'p99', 'mean', 'max', 'sum']
+
+
+def show_performance(supabase: Client):
+    st.header("Performance")
+    st.write("Time spent in each stage of the pages since the app started, across all sessions. "
+             "Latencies are in milliseconds, estimated from histograms to within about 20%.")
+    st.write('---------------------')
+
+    tracer = tracing.get_tracer()
+    if not tracer.enabled:
+        st.info("Tracing is disabled. Unset TRACING=0 and restart the app to collect stage timings.")
+        return
+
+    snapshot = tracer.snapshot()
+    if not snapshot:
+        st.info("No stages timed yet. Open the Predictions, Analysis or Vehicle Form pages first.")
+        return
+
+    stats = pd.DataFrame.from_dict(snapshot, orient='index')[STAT_COLUMNS]
+    seconds = ['p50', 'p95', 'p99', 'mean', 'max']
+    stats[seconds] = stats[seconds] * 1000
+    stats.index.name = 'stage'
+    # Stages are named "<page>.<step>", so each page's breakdown reads as one block
+    for page, stages in stats.groupby(stats.index.str.split('.').str[0], sort=True):
+        st.subheader(page)
+        st.dataframe(stages.style.format({'sum': '{:.2f}s', **{c: '{:.1f}' for c in seconds}}),
+                     use_container_width=True)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("Prometheus text", tracer.to_prometheus(), "metrics.txt", mime="text/plain")
+    with col2:
+        st.download_button("JSON", tracer.to_json(), "metrics.json", mime="application/json")
+    with col3:
+        if st.button("Reset"):
+            tracer.reset()
+            st.experimental_rerun()
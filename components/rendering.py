@@ -0,0 +1,57 @@
+import datetime
+import html
+
+import numpy as np
+import pandas as pd
+
+from core import maintenance
+from core.maintenance import FAILURE_COLUMNS
+
+FAILURE_LABELS = ["Engine Failure", "Overstrain Failure", "Heat Dissipation Failure"]
+
+MAINTENANCE_WARNING = '<p class="failure-info orange"><b>⚠️ General Maintenance Required</b></p>'
+
+def _escaped(values: pd.Series) -> list:
+    return [html.escape(str(value)) for value in values.tolist()]
+
+def table_html(df: pd.DataFrame) -> str:
+    """Builds the vehicle table in one pass and joins it once, instead of growing a string per cell."""
+    header = "".join(f"<th>{html.escape(str(column))}</th>" for column in df.columns)
+    cells = [_escaped(df[column]) for column in df.columns]
+    body = "".join("<tr>" + "".join(f"<td>{value}</td>" for value in row) + "</tr>" for row in zip(*cells))
+    return f"<table><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>"
+
+def cards_html(predictions_df: pd.DataFrame, plan: pd.DataFrame = None, today: datetime.date = None) -> str:
+    """Builds every prediction card at once and wraps them in a single CSS grid.
+
+    plan is maintenance.maintenance_plan(predictions_df), computed here
+    unless the caller already has it.
+    """
+    if predictions_df.empty:
+        return ""
+    if plan is None:
+        plan = maintenance.maintenance_plan(predictions_df, today)
+
+    # Highlight the highest failure in red
+    probabilities = [predictions_df[column].to_numpy() for column in FAILURE_COLUMNS]
+    highest = np.column_stack(probabilities).argmax(axis=1)
+    failures = [
+        [f'<p class="failure-info{" red" if is_highest else ""}"><b>{label}:</b> {value:.5f}</p>'
+         for is_highest, value in zip(highest == i, values.tolist())]
+        for i, (values, label) in enumerate(zip(probabilities, FAILURE_LABELS))
+    ]
+
+    service_dates = predictions_df['last_serviced_date']
+    starts = np.datetime_as_string(plan['window_start'].to_numpy(), unit='D')
+    ends = np.datetime_as_string(plan['window_end'].to_numpy(), unit='D')
+
+    cards = "".join(
+        f'<div class="vehicle-card"><h4> Vehicle ID: {vehicle_id}</h4>{engine}{overstrain}{heat}'
+        f'<p><b>Prev Service Date:</b> {service_date}</p><p><b>Next Service:</b> {window}</p>'
+        f'<p><b>Urgency:</b> {urgency:.2f}</p>{MAINTENANCE_WARNING if is_overdue else ""}</div>'
+        for vehicle_id, engine, overstrain, heat, service_date, window, urgency, is_overdue in zip(
+            _escaped(predictions_df['vehicle_id']), *failures, _escaped(service_dates),
+            [f'{start} to {end}' for start, end in zip(starts, ends)],
+            plan['urgency'].tolist(), plan['overdue'].tolist())
+    )
+    return f'<div class="card-grid">{cards}</div>'
@@ -0,0 +1,74 @@
+import streamlit as st
+import datetime
+from supabase import Client
+
+from core import registry, scheduler, vehicles
+from core.prediction_store import get_store
+from core.scoring import stream_top_predictions
+
+
+def build_schedule(supabase: Client, bays: int, days: int, hours: float, start: datetime.date):
+    user_id = st.session_state.user.id
+    bundle = registry.get_model()
+    store = get_store()
+
+    # Scoring the pages brings the store up to date, as on the Predictions page; the
+    # schedule is then built from every stored prediction of the current model
+    with st.spinner("Scoring the fleet..."):
+        for _, seen, errors in stream_top_predictions(vehicles.iter_pages(supabase, user_id), bundle,
+                                                      bundle.transform, 1, store=store, user_id=user_id):
+            for vehicle, message in errors:
+                st.error(f"Error processing record {vehicle}: {message}")
+    predictions = store.top_k(user_id, bundle.version, -1)
+    if predictions.empty:
+        st.session_state.maintenance_schedule = None
+        st.info("No scored vehicles yet. Add vehicles on the Vehicle Form page first.")
+        return
+    st.session_state.maintenance_schedule = scheduler.plan_workshop(predictions, bays, days, hours, start)
+
+
+def show_scheduler(supabase: Client):
+    st.header("Maintenance Schedule")
+    st.write("Books the vehicles that are overdue, due soon or likely to fail into your workshop's bays, "
+             "the most urgent first.")
+    st.write('---------------------')
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        bays = st.number_input("Workshop bays", min_value=1, max_value=500, value=scheduler.BAYS)
+    with col2:
+        days = st.number_input("Days to plan", min_value=1, max_value=90, value=scheduler.HORIZON_DAYS)
+    with col3:
+        hours = st.number_input("Hours per bay and day", min_value=1.0, max_value=24.0,
+                                value=scheduler.HOURS_PER_DAY, step=0.5)
+    with col4:
+        start = st.date_input("First day", value=datetime.date.today())
+
+    try:
+        if st.button("Build schedule"):
+            build_schedule(supabase, int(bays), int(days), float(hours), start)
+    except ValueError as e:
+        st.error(f"Could not build the schedule: {e}")
+    except Exception as e:
+        st.error(f"Error building the schedule: {e}")
+
+    planned = st.session_state.get("maintenance_schedule")
+    if not planned:
+        return
+    schedule, stats = planned
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Scheduled", f"{stats['scheduled']} / {stats['jobs']}")
+    col2.metric("Not in horizon", stats['unscheduled'])
+    col3.metric("Booked late", stats['late'])
+    col4.metric("Bay hours used", f"{stats['utilisation']:.0%}")
+    st.caption(f"Planned in {stats['seconds']:.2f}s; local search made {stats['moves']} moves, "
+               f"cost {stats['greedy_cost']:.1f} → {stats['cost']:.1f}")
+
+    booked = schedule[schedule['bay'].notna()]
+    st.dataframe(booked, hide_index=True, use_container_width=True)
+    if stats['unscheduled']:
+        with st.expander(f"{stats['unscheduled']} vehicles that did not fit"):
+            st.dataframe(schedule[schedule['bay'].isna()][['vehicle_id', 'hours', 'work', 'urgency', 'overdue',
+                                                           'due_date']], hide_index=True, use_container_width=True)
+    st.download_button("Download schedule (CSV)", schedule.to_csv(index=False), "maintenance_schedule.csv",
+                       mime="text/csv")
@@ -5,6 +5,8 @@ from supabase import Client
 from typing import Dict, Any
 import logging
 
+from core import ingest, maintenance, vehicles
+
 def show_vehicle_update_form(supabase: Client):
     # Fetch the vehicle_id from session state for updating
     vehicle_id = st.session_state.get('vehicle_id_to_update')
@@ -16,10 +18,9 @@ def show_vehicle_update_form(supabase: Client):
 
         # Fetch the vehicle details
         try:
-            response = supabase.table("vehicles").select("*").eq("vehicle_id", vehicle_id).execute()
+            vehicle_data = vehicles.get_vehicle(supabase, st.session_state.user.id, vehicle_id)
 
-            if response and response.data:
-                vehicle_data = response.data[0]
+            if vehicle_data:
 
                 col1, col2 = st.columns(2)
                 
@@ -30,13 +31,8 @@ def show_vehicle_update_form(supabase: Client):
                         brand = st.text_input("Car Brand", value=vehicle_data.get("brand", ""))
                         model_name = st.text_input("Car Model", value=vehicle_data.get("model_name", ""))
 
-                        # Handling the datetime format error
-                        last_serviced_date_str = vehicle_data.get("last_serviced_date", "")
-                        if last_serviced_date_str:
-                            last_serviced_date = datetime.strptime(last_serviced_date_str.split('T')[0], "%Y-%m-%d").date()
-                        else:
-                            last_serviced_date = datetime.now().date()
-                        
+                        last_serviced_date = maintenance.parse_service_date(vehicle_data.get("last_serviced_date")) \
+                                             or datetime.now().date()
                         last_serviced_date = st.date_input("Last Service Date", value=last_serviced_date)
 
                         vehicle_speed_sensor = st.text_input("Vehicle Speed Sensor", value=str(vehicle_data.get("vehicle_speed_sensor", "")))
@@ -71,14 +67,8 @@ def show_vehicle_update_form(supabase: Client):
                                 # If a new file is uploaded, update it in Supabase Storage
                                 file_url = vehicle_data.get("manual_link")
                                 if manual_link_file is not None:
-                                    file_name = f"manuals/{st.session_state.user.id}_{manual_link_file.name}"
-                                    file_bytes = manual_link_file.read()
-                                    response = supabase.storage.from_("manuals").upload(
-                                        file_name, file_bytes, file_options={"content-type": manual_link_file.type}
-                                    )
-
-                                    if response:
-                                        file_url = supabase.storage.from_("manuals").get_public_url(file_name)
+                                    file_url, _ = ingest.upload_manual(supabase, st.session_state.user.id,
+                                                                       manual_link_file.read())
 
                                 # Update the vehicle data
                                 updated_vehicle_data = {
@@ -104,6 +94,7 @@ def show_vehicle_update_form(supabase: Client):
                                                                
                                 # Update the vehicle data in Supabase
                                 supabase.table('vehicles').update(updated_vehicle_data).eq("vehicle_id", vehicle_id).execute()
+                                vehicles.invalidate(st.session_state.user.id)
 
                                 st.success("Vehicle updated successfully!")
                             except ValueError as e:
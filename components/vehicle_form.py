@@ -5,12 +5,19 @@ from supabase import Client
 from typing import Dict, Any
 import logging
 
+from core import ingest, tracing, vehicles
+from core.prediction_store import get_store
+from components import pagination
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@tracing.traced("vehicle_form.delete")
 def delete_vehicle(supabase: Client, vehicle_id: str):
     try:
         response = supabase.table("vehicles").delete().eq("vehicle_id", vehicle_id).execute()
+        vehicles.invalidate(st.session_state.user.id)
+        get_store().forget(st.session_state.user.id, [vehicle_id])
         if response and response.data:
             st.success(f"Vehicle {vehicle_id} deleted successfully!")
         else:
@@ -18,6 +25,49 @@ def delete_vehicle(supabase: Client, vehicle_id: str):
     except Exception as e:
         st.error(f"Error deleting vehicle: {str(e)}")
 
+def show_bulk_import(supabase: Client):
+    with st.expander("Import a fleet from a file"):
+        st.write("Upload telemetry in the fleet_train.csv layout (CSV or Parquet). Each truckid becomes a vehicle "
+                 "with its latest measurement; importing again updates the same vehicles. Optional brand, "
+                 "model_name, last_serviced_date and manual columns override the defaults below, where manual "
+                 "is the file name of one of the uploaded PDFs.")
+        fleet_file = st.file_uploader("Fleet telemetry", type=["csv", "parquet"])
+        manual_files = st.file_uploader("Manuals (PDF)", type=["pdf"], accept_multiple_files=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            brand = st.text_input("Default Brand")
+            model_name = st.text_input("Default Model")
+        with col2:
+            last_serviced_date = st.date_input("Default Last Service Date", min_value=datetime(2000, 1, 1), max_value=datetime.now().date())
+            default_manual = st.selectbox("Default Manual", ["(none)"] + [f.name for f in manual_files or []])
+        submitted = st.button("Import Fleet")
+
+    if not submitted:
+        return
+    if fleet_file is None:
+        st.error("Please upload a fleet file")
+        return
+    try:
+        with tracing.span("vehicle_form.read_upload"):
+            df = ingest.read_upload(fleet_file.name, fleet_file.getvalue())
+        defaults = {
+            "brand": brand or None,
+            "model_name": model_name or None,
+            "last_serviced_date": last_serviced_date.isoformat(),
+            "manual": None if default_manual == "(none)" else default_manual,
+        }
+        with st.spinner(f"Importing {len(df)} rows..."), tracing.span("vehicle_form.bulk_import"):
+            result = ingest.import_fleet(supabase, st.session_state.user.id, df,
+                                         {f.name: f.getvalue() for f in manual_files or []}, defaults)
+        st.success(f"Imported {result['imported']} vehicles; uploaded {result['manuals_uploaded']} new manuals "
+                   f"({result['manuals_reused']} already stored).")
+        if result['rejected']:
+            st.warning(f"{result['rejected']} vehicles were rejected:")
+            st.dataframe(pd.DataFrame(result['errors'], columns=["vehicle_id", "reason"]))
+    except Exception as e:
+        st.error(f"Error importing fleet: {str(e)}")
+
+@tracing.traced("vehicle_form.page")
 def show_vehicle_form(supabase: Client):
     st.header("Add Vehicle Details")
     st.write("Add your vehicle details in the form below to analyze and predict its maintenance requirements.")
@@ -58,13 +108,12 @@ def show_vehicle_form(supabase: Client):
             st.error("Please upload a vehicle manual")
         else:
             try:
-                file_name = f"manuals/{st.session_state.user.id}_{manual_link_file.name}"
-                file_bytes = manual_link_file.read()
-                response = supabase.storage.from_("manuals").upload(file_name, file_bytes, file_options={"content-type": manual_link_file.type})
-                
-                if response:
-                    file_url = supabase.storage.from_("manuals").get_public_url(file_name)
-                    vehicles: Dict[str, Any] = {
+                # Stored under its content hash, so a manual shared by several vehicles is uploaded once
+                with tracing.span("vehicle_form.upload_manual"):
+                    file_url, _ = ingest.upload_manual(supabase, st.session_state.user.id, manual_link_file.read())
+
+                if file_url:
+                    vehicle: Dict[str, Any] = {
                         "user_id": st.session_state.user.id,
                         "vehicle_id": vehicle_id,
                         "brand": brand,
@@ -89,17 +138,21 @@ def show_vehicle_form(supabase: Client):
                         "score": None
                     }
                     
-                    supabase.table('vehicles').insert(vehicles).execute()
+                    with tracing.span("vehicle_form.insert"):
+                        supabase.table('vehicles').insert(vehicle).execute()
+                    vehicles.invalidate(st.session_state.user.id)
                     st.success("Vehicle added successfully!")
                 else:
                     st.error("Failed to upload manual file.")
             except Exception as e:
                 st.error(f"Error adding vehicle: {str(e)}")
 
+    show_bulk_import(supabase)
+
     try:
-        response = supabase.table("vehicles").select("*").eq("user_id", st.session_state.user.id).execute()
-        if response and response.data:
-            df = pd.DataFrame(response.data)
+        with tracing.span("vehicle_form.table_page"):
+            df = pagination.get_table_page(supabase, "vehicle_list")
+        if not df.empty:
             st.subheader("Current Vehicles")
             st.write('List of all added vehicles, click to update or delete.')
             st.write('------------------------------------------------------------------------')
@@ -116,6 +169,8 @@ def show_vehicle_form(supabase: Client):
                         if st.button(f"Delete {row['vehicle_id']}", key=f"delete_{row['vehicle_id']}"):
                             delete_vehicle(supabase, row['vehicle_id'])
                             st.experimental_rerun()
+
+            pagination.show_page_controls("vehicle_list", df)
             
             col1, col2, col3 = st.columns([1, 1, 1])
             with col2:
@@ -0,0 +1,295 @@
+"""Headless fleet scoring, e.g. for a nightly job.
+
+Scores vehicles from Supabase, from a CSV/Parquet export shaped like
+model/fleet_train_imputed.csv or from a core.dataset directory, in chunks
+spread over worker processes:
+
+    python -m core.batch model/fleet_train_imputed.csv --output scores.csv
+    python -m core.batch supabase [--user-id <uuid>] [--dry-run]
+
+From Supabase the priorities and failure probabilities are written back to
+the vehicles table, touching only those columns; file sources are streamed
+to --output.
+"""
+import argparse
+import datetime
+import io
+import logging
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core import dataset, registry, vehicles
+from core.features import rename_mapping
+from core.scoring import PROBABILITY_COLUMNS, score_fleet
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5_000
+# Raw CSV bytes handed to a worker at a time, roughly 16k telemetry rows
+CSV_BLOCK_BYTES = 4 * 2**20
+# Vehicles whose scores are written back per call of SCORE_FUNCTION
+WRITE_BATCH_SIZE = 1000
+
+# Identifying columns of a telemetry export carried through to the output
+FILE_KEY_COLUMNS = ['record_id', 'Measurement_timestamp', 'fleetid', 'truckid', 'Region']
+# Columns read from Parquet sources; the rest of the telemetry is never decoded
+FILE_COLUMNS = [*FILE_KEY_COLUMNS, *dataset.MODEL_INPUT_COLUMNS]
+
+# The only columns the scorer writes; everything else belongs to the user
+SCORE_COLUMNS = ["score", "priority", "condition_score", *PROBABILITY_COLUMNS, "scored_at"]
+# Postgres function updating SCORE_COLUMNS of many rows by id in one statement (see the README)
+SCORE_FUNCTION = "update_vehicle_scores"
+
+# The model bundle of a worker process, loaded once by _init_worker
+_bundle = None
+
+
+def _init_worker(model_path: str, scaler_path: str):
+    global _bundle
+    _bundle = registry.get_model(model_path, scaler_path)
+
+
+def _score_records(chunk: pd.DataFrame):
+    records = chunk.rename(columns=rename_mapping)
+    if 'vehicle_id' not in records.columns and 'truckid' in records.columns:
+        records['vehicle_id'] = records['truckid']
+    predictions, errors = score_fleet(records, _bundle, _bundle.transform)
+    label = next((c for c in ('record_id', 'vehicle_id') if c in records.columns), None)
+    if label is not None:
+        errors = [(records.at[idx, label], message) for idx, message in errors]
+    return predictions, errors
+
+
+def _file_output(chunk: pd.DataFrame, predictions: pd.DataFrame) -> pd.DataFrame:
+    keys = [column for column in FILE_KEY_COLUMNS if column in chunk.columns]
+    return chunk.loc[predictions.index, keys].join(predictions.drop(columns=['last_serviced_date']))
+
+
+def _score_frame(chunk: pd.DataFrame):
+    predictions, errors = _score_records(chunk)
+    return _file_output(chunk, predictions), errors
+
+
+def _score_csv_block(header: bytes, block: bytes):
+    return _score_frame(pd.read_csv(io.BytesIO(header + block)))
+
+
+def _pooled(fn: Callable, tasks: Iterable[Tuple], model_path: str, scaler_path: str,
+            workers: int = None) -> Iterator[Tuple[Tuple, Any]]:
+    """Runs fn(*task) across worker processes, yielding (task, result) in input order.
+
+    Tasks are pulled only as fast as results are consumed, two per worker
+    ahead at most, so memory does not grow with the input.
+    """
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path, scaler_path)) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append((task, executor.submit(fn, *task)))
+            if len(pending) >= 2 * workers:
+                task, future = pending.popleft()
+                yield task, future.result()
+        while pending:
+            task, future = pending.popleft()
+            yield task, future.result()
+
+
+def _is_columnar(path: str) -> bool:
+    return path.endswith(".parquet") or dataset.is_dataset(path)
+
+
+def read_file(path: str, chunk_size: int = CHUNK_SIZE, filter=None) -> Iterator[pd.DataFrame]:
+    """Yields a CSV, Parquet or dataset telemetry export chunk by chunk.
+
+    Parquet sources are read for FILE_COLUMNS only, skipping the rows and
+    partitions filter rules out.
+    """
+    if _is_columnar(path):
+        yield from dataset.iter_batches(path, FILE_COLUMNS, filter, chunk_size)
+    elif filter is not None:
+        raise ValueError("Row filters need a Parquet source (see python -m core.dataset)")
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def iter_csv_blocks(path: str, block_bytes: int = CSV_BLOCK_BYTES) -> Iterator[Tuple[bytes, bytes]]:
+    """Splits a CSV into (header, block) pairs on line boundaries without parsing it.
+
+    Parsing then happens in the workers instead of the parent. Quoted fields
+    spanning lines are not supported, which telemetry exports don't use.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        while True:
+            block = f.read(block_bytes)
+            if not block:
+                return
+            if not block.endswith(b'\n'):
+                block += f.readline()
+            yield header, block
+
+
+def score_chunks(chunks: Iterable[pd.DataFrame], model_path: str = registry.MODEL_PATH,
+                 scaler_path: str = registry.SCALER_PATH, workers: int = None
+                 ) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame, List[Tuple[Any, str]]]]:
+    """Scores raw record chunks across worker processes.
+
+    Yields (chunk, predictions, errors) in input order; predictions are
+    indexed like the chunk and errors name the record_id or vehicle_id.
+    """
+    for (chunk,), (predictions, errors) in _pooled(_score_records, ((chunk,) for chunk in chunks),
+                                                   model_path, scaler_path, workers):
+        yield chunk, predictions, errors
+
+
+class ScoreWriter:
+    """Appends scored chunks to a CSV or Parquet file as they arrive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self._parquet = path.endswith(".parquet")
+        self._file = None if self._parquet else open(path, 'w', newline='')
+        self._writer = None
+
+    def write(self, frame: pd.DataFrame):
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            frame.to_csv(self._file, header=self.rows == 0, index=False)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def score_file(source: str, output: str, model_path: str = registry.MODEL_PATH,
+               scaler_path: str = registry.SCALER_PATH, workers: int = None,
+               chunk_size: int = CHUNK_SIZE, block_bytes: int = CSV_BLOCK_BYTES, filter=None) -> Dict[str, Any]:
+    """Scores a telemetry export into output, holding only the chunks in flight in memory.
+
+    CSV blocks are parsed by the workers; Parquet files and dataset
+    directories are read in record batches of chunk_size rows, filtered by
+    filter (see dataset.make_filter). Returns row counts, priorities and
+    throughput.
+    """
+    if _is_columnar(source):
+        fn, tasks = _score_frame, ((chunk,) for chunk in read_file(source, chunk_size, filter))
+    elif filter is not None:
+        raise ValueError("Row filters need a Parquet source (see python -m core.dataset)")
+    else:
+        fn, tasks = _score_csv_block, iter_csv_blocks(source, block_bytes)
+
+    start = time.perf_counter()
+    skipped = 0
+    priorities = Counter()
+    with ScoreWriter(output) as writer:
+        for _, (scored, errors) in _pooled(fn, tasks, model_path, scaler_path, workers):
+            skipped += len(errors)
+            for record, message in errors:
+                logger.warning("Skipped record %s: %s", record, message)
+            priorities.update(scored["priority"].tolist())
+            writer.write(scored)
+    elapsed = time.perf_counter() - start
+    return {'rows': writer.rows, 'skipped': skipped, 'seconds': elapsed,
+            'rows_per_s': writer.rows / elapsed if elapsed else np.inf, 'priorities': dict(priorities)}
+
+
+def update_scores(supabase, records: pd.DataFrame, predictions: pd.DataFrame,
+                  batch_size: int = WRITE_BATCH_SIZE) -> int:
+    """Writes predictions onto the vehicles rows they were computed from; returns the rows written.
+
+    Rows go batch_size at a time to SCORE_FUNCTION, one UPDATE of
+    SCORE_COLUMNS by id per batch, so an edit a user makes while the job
+    runs is never overwritten with the values it read.
+    """
+    if predictions.empty:
+        return 0
+    rows = pd.DataFrame({"id": records.loc[predictions.index, "id"], "score": predictions["prediction_score"]},
+                        index=predictions.index)
+    for column in ["priority", "condition_score", *PROBABILITY_COLUMNS]:
+        rows[column] = predictions[column]
+    rows["scored_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    rows = rows[["id", *SCORE_COLUMNS]].astype(object).where(rows.notna(), None).to_dict("records")
+
+    written = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        response = vehicles.with_retry(lambda: supabase.rpc(SCORE_FUNCTION, {"scores": batch}).execute())
+        written += response.data or 0
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.batch", description=__doc__.splitlines()[0])
+    parser.add_argument("source", help='a .csv/.parquet telemetry export, a core.dataset directory, or "supabase"')
+    parser.add_argument("--output", help="where to write the scores of a file source (.csv or .parquet)")
+    parser.add_argument("--user-id", help="only score this user's vehicles (supabase source)")
+    parser.add_argument("--dry-run", action="store_true", help="score the supabase fleet without writing back")
+    parser.add_argument("--model", default=registry.MODEL_PATH)
+    parser.add_argument("--scaler", default=registry.SCALER_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    dataset.add_filter_arguments(parser)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.source == "supabase" and dataset.filter_from_args(args) is not None:
+        parser.error("--fleet/--region/--since/--until apply to file sources only")
+    if args.source != "supabase":
+        if not args.output:
+            parser.error("--output is required for file sources")
+        stats = score_file(args.source, args.output, args.model, args.scaler, args.workers, args.chunk_size,
+                           filter=dataset.filter_from_args(args))
+        logger.info("Scored %d records (%d skipped) in %.1fs with %d workers, %.0f rows/s, priorities %s",
+                    stats['rows'], stats['skipped'], stats['seconds'], args.workers,
+                    stats['rows_per_s'], stats['priorities'])
+        return
+
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    load_dotenv()
+    supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_KEY'))
+    pages = vehicles.iter_all_pages(supabase, user_id=args.user_id, page_size=args.chunk_size)
+
+    start = time.perf_counter()
+    scored = skipped = written = 0
+    priorities = Counter()
+    for chunk, predictions, errors in score_chunks(pages, args.model, args.scaler, args.workers):
+        scored += len(predictions)
+        skipped += len(errors)
+        priorities.update(predictions["priority"].tolist())
+        for record, message in errors:
+            logger.warning("Skipped vehicle %s: %s", record, message)
+        if not args.dry_run:
+            written += update_scores(supabase, chunk, predictions)
+    elapsed = time.perf_counter() - start
+    logger.info("Scored %d vehicles (%d skipped, %d written) in %.1fs, %.0f rows/s, priorities %s",
+                scored, skipped, written, elapsed, scored / elapsed if elapsed else np.inf, dict(priorities))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from core import pdf_text, vehicles
+from core.llm_gateway import OLLAMA_URL, get_gateway
+from core.manual_cache import fetch_manual
+from core.manual_index import build_context
+from core.scoring import PROBABILITY_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+BRIEFING_STORE_PATH = os.getenv("BRIEFING_STORE_PATH", "briefings.sqlite3")
+
+MODEL = "llama2"
+TEMPERATURE = 0.3
+# Highest prediction_score vehicles briefed after each scoring run
+BRIEFING_TOP_N = 5
+# Briefings generated at once; each one holds a manual and an Ollama generation
+BRIEFING_CONCURRENCY = 2
+
+FAILURE_TYPES = dict(zip(PROBABILITY_COLUMNS, ["Engine Failure", "Overstrain Failure", "Heat Dissipation Failure"]))
+
+# Only the manual and the prediction go into the prompt, so vehicles sharing both share one generation
+BRIEFING_TEMPLATE = """
+You are preparing a maintenance briefing for a technician. Using only the
+manual excerpts below, list the likely causes, the inspections to perform
+and the repair or maintenance steps for the predicted problem. If the
+excerpts don't cover it, say so.
+
+Predicted problem: {failure_type}
+Priority: {priority}
+
+Manual excerpts:
+{context}
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS briefings (
+    user_id TEXT NOT NULL,
+    vehicle_id TEXT NOT NULL,
+    failure_type TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    manual_link TEXT NOT NULL,
+    model TEXT NOT NULL,
+    briefing TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (user_id, vehicle_id)
+)
+"""
+
+
+class BriefingStore:
+    """Local SQLite store of generated briefings, one per (user, vehicle).
+
+    A briefing stays current while the predicted failure type, the priority,
+    the manual and the model are the ones it was written for.
+    """
+
+    def __init__(self, path: str = BRIEFING_STORE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Briefings can be written again, so a file from an older layout is simply rebuilt
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(briefings)")}
+            if columns and 'priority' not in columns:
+                self._conn.execute("DROP TABLE briefings")
+            self._conn.execute(_SCHEMA)
+
+    def get(self, user_id: str, vehicle_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT failure_type, priority, manual_link, model, briefing, created_at FROM briefings "
+                "WHERE user_id = ? AND vehicle_id = ?", (user_id, str(vehicle_id))).fetchone()
+        if row is None:
+            return None
+        return dict(zip(['failure_type', 'priority', 'manual_link', 'model', 'briefing', 'created_at'], row))
+
+    def is_current(self, user_id: str, vehicle_id: str, failure_type: str, priority: str, manual_link: str) -> bool:
+        briefing = self.get(user_id, vehicle_id)
+        return (briefing is not None and briefing['failure_type'] == failure_type
+                and briefing['priority'] == priority and briefing['manual_link'] == manual_link
+                and briefing['model'] == MODEL)
+
+    def save(self, user_id: str, vehicle_id: str, failure_type: str, priority: str, manual_link: str,
+             briefing: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO briefings (user_id, vehicle_id, failure_type, priority, manual_link, "
+                "model, briefing, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, str(vehicle_id), failure_type, priority, manual_link, MODEL, briefing, time.time()))
+
+
+class BriefingQueue:
+    """Background workers that write briefings for the riskiest vehicles.
+
+    At most `concurrency` briefings are generated at once and a vehicle is
+    queued only once at a time. progress() reports the queue's counters.
+    """
+
+    def __init__(self, store: BriefingStore, concurrency: int = BRIEFING_CONCURRENCY):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="briefing")
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._embeddings = None
+        self.counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0, 'skipped': 0}
+        # Running total of the generation time of the briefings written
+        self._seconds = 0.0
+
+    def enqueue_top(self, supabase, user_id: str, predictions: pd.DataFrame, top_n: int = BRIEFING_TOP_N) -> int:
+        """Queues briefings for the top_n vehicles by prediction_score; returns how many were queued."""
+        queued = 0
+        for row in predictions.nlargest(top_n, 'prediction_score').itertuples(index=False):
+            probabilities = np.array([getattr(row, column) for column in PROBABILITY_COLUMNS])
+            failure_column = PROBABILITY_COLUMNS[int(probabilities.argmax())]
+            job = {
+                'vehicle_id': row.vehicle_id,
+                'failure_type': FAILURE_TYPES[failure_column],
+                'priority': getattr(row, 'priority', 'Unknown'),
+            }
+            key = (user_id, str(row.vehicle_id))
+            with self._lock:
+                if key in self._pending:
+                    continue
+                self._pending.add(key)
+                self.counts['queued'] += 1
+            self._executor.submit(self._run, supabase, user_id, job)
+            queued += 1
+        return queued
+
+    def _run(self, supabase, user_id: str, job: Dict[str, Any]):
+        key = (user_id, str(job['vehicle_id']))
+        with self._lock:
+            self.counts['queued'] -= 1
+            self.counts['running'] += 1
+        start = time.perf_counter()
+        outcome = 'done'
+        try:
+            vehicle = vehicles.get_vehicle(supabase, user_id, job['vehicle_id'])
+            manual_link = vehicle and vehicle['manual_link']
+            if not manual_link or self.store.is_current(user_id, job['vehicle_id'], job['failure_type'],
+                                                        job['priority'], manual_link):
+                outcome = 'skipped'
+            else:
+                self.store.save(user_id, job['vehicle_id'], job['failure_type'], job['priority'], manual_link,
+                                self._write_briefing(supabase, manual_link, job))
+        except Exception:
+            logger.exception("Briefing for vehicle %s failed", job['vehicle_id'])
+            outcome = 'failed'
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+                self.counts['running'] -= 1
+                self.counts[outcome] += 1
+                if outcome == 'done':
+                    self._seconds += time.perf_counter() - start
+
+    def _write_briefing(self, supabase, manual_link: str, job: Dict[str, Any]) -> str:
+        embeddings = self._get_embeddings()
+        manual = fetch_manual(supabase, manual_link)
+        manual_index = manual.index(embeddings.embed_documents, MODEL, pdf_text.iter_pages)
+        query = f"{job['failure_type']} causes, inspection and repair"
+        context = build_context(manual_index, embeddings.embed_query(query)) or "(no text in the manual)"
+        prompt = BRIEFING_TEMPLATE.format(context=context, failure_type=job['failure_type'], priority=job['priority'])
+        key = ("briefing", manual.digest, job['failure_type'], job['priority'], MODEL, TEMPERATURE)
+        return get_gateway().generate(prompt, key, MODEL, temperature=TEMPERATURE)
+
+    def _get_embeddings(self):
+        with self._lock:
+            if self._embeddings is None:
+                from langchain_community.embeddings import OllamaEmbeddings
+
+                self._embeddings = OllamaEmbeddings(model=MODEL, base_url=OLLAMA_URL)
+            return self._embeddings
+
+    def progress(self) -> Dict[str, float]:
+        with self._lock:
+            done = self.counts['done']
+            return {**self.counts, 'mean_seconds': self._seconds / done if done else 0.0}
+
+
+_queue: Optional[BriefingQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_briefing_queue() -> BriefingQueue:
+    """Returns the process-wide briefing queue and its store."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = BriefingQueue(BriefingStore())
+    return _queue
@@ -0,0 +1,138 @@
+"""Fleet telemetry as a typed, partitioned Parquet dataset.
+
+Converts a CSV export shaped like model/fleet_train_imputed.csv into a
+hive-partitioned dataset (fleetid=.../Region=.../*.parquet) with
+Measurement_timestamp parsed to a timestamp:
+
+    python -m core.dataset model/fleet_train_imputed.csv data/fleet
+
+Readers ask for only the columns they use, and filters on fleetid/Region
+skip whole partitions while timestamp filters skip row groups by their
+statistics. core.train and core.batch accept a dataset directory wherever
+they accept a CSV.
+"""
+import argparse
+import datetime
+import logging
+import os
+from typing import Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from core.features import DERIVED_FEATURES, MODEL_FEATURES
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%d%b%y:%H:%M:%S"
+PARTITION_COLUMNS = ["fleetid", "Region"]
+ROW_GROUP_ROWS = 100_000
+BATCH_ROWS = 5_000
+
+# Raw telemetry the model features are computed from
+MODEL_INPUT_COLUMNS = [f for f in MODEL_FEATURES if f not in DERIVED_FEATURES]
+
+
+def is_dataset(path: str) -> bool:
+    return os.path.isdir(path)
+
+
+def convert(csv_path: str, dataset_dir: str, partition_columns: Sequence[str] = PARTITION_COLUMNS,
+            block_bytes: int = 16 * 2**20) -> int:
+    """Writes a CSV export to dataset_dir, streaming it block by block; returns the rows written.
+
+    Partition columns missing from the export are left out. Existing
+    partitions the export also covers are replaced.
+    """
+    import pyarrow.csv as pv
+    import pyarrow.dataset as ds
+
+    reader = pv.open_csv(csv_path, read_options=pv.ReadOptions(block_size=block_bytes),
+                         convert_options=pv.ConvertOptions(timestamp_parsers=[TIMESTAMP_FORMAT]))
+    partition_columns = [c for c in partition_columns if c in reader.schema.names]
+    rows = 0
+
+    def batches():
+        nonlocal rows
+        for batch in reader:
+            rows += batch.num_rows
+            yield batch
+
+    ds.write_dataset(batches(), dataset_dir, schema=reader.schema, format="parquet",
+                     partitioning=partition_columns or None, partitioning_flavor="hive",
+                     existing_data_behavior="delete_matching",
+                     max_rows_per_group=ROW_GROUP_ROWS, min_rows_per_group=min(ROW_GROUP_ROWS, 10_000))
+    return rows
+
+
+def open_dataset(path: str):
+    import pyarrow.dataset as ds
+
+    return ds.dataset(path, format="parquet", partitioning="hive")
+
+
+def make_filter(fleetids: Sequence[str] = None, regions: Sequence[int] = None,
+                since: datetime.datetime = None, until: datetime.datetime = None):
+    """A pyarrow filter expression for the given fleets, regions and [since, until) time range, or None."""
+    import pyarrow.dataset as ds
+
+    conditions = []
+    if fleetids:
+        conditions.append(ds.field("fleetid").isin(list(fleetids)))
+    if regions:
+        conditions.append(ds.field("Region").isin([int(r) for r in regions]))
+    if since is not None:
+        conditions.append(ds.field("Measurement_timestamp") >= since)
+    if until is not None:
+        conditions.append(ds.field("Measurement_timestamp") < until)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def _present(dataset, columns: Optional[Sequence[str]]) -> Optional[List[str]]:
+    if columns is None:
+        return None
+    return [c for c in columns if c in dataset.schema.names]
+
+
+def load(path: str, columns: Sequence[str] = None, filter=None) -> pd.DataFrame:
+    """Reads the requested columns (those the dataset has) of the rows matching filter."""
+    dataset = open_dataset(path)
+    return dataset.to_table(columns=_present(dataset, columns), filter=filter).to_pandas()
+
+
+def iter_batches(path: str, columns: Sequence[str] = None, filter=None,
+                 batch_size: int = BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """Yields the matching rows as DataFrames of at most batch_size rows, reading one batch at a time."""
+    dataset = open_dataset(path)
+    for batch in dataset.to_batches(columns=_present(dataset, columns), filter=filter, batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser):
+    """Adds --fleet/--region/--since/--until, for commands reading a dataset directory."""
+    parser.add_argument("--fleet", action="append", help="only rows of this fleetid (repeatable)")
+    parser.add_argument("--region", type=int, action="append", help="only rows of this Region (repeatable)")
+    parser.add_argument("--since", type=datetime.datetime.fromisoformat, help="only rows measured at or after")
+    parser.add_argument("--until", type=datetime.datetime.fromisoformat, help="only rows measured before")
+
+
+def filter_from_args(args: argparse.Namespace):
+    return make_filter(args.fleet, args.region, args.since, args.until)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.dataset", description=__doc__.splitlines()[0])
+    parser.add_argument("csv", help="telemetry export shaped like model/fleet_train_imputed.csv")
+    parser.add_argument("dataset", help="directory to write the partitioned dataset to")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    rows = convert(args.csv, args.dataset)
+    logger.info("Wrote %d rows to %s", rows, args.dataset)
+
+
+if __name__ == "__main__":
+    main()
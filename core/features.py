@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+FEATURES = [
+    'Engine_Load', 'Engine_RPM', 'Engine_Coolant_Temp', 'Vibration',
+    'Mass_Air_Flow_Rate', 'Engine_Oil_Temp', 'Throttle_Pos_Manifold',
+    'Accel_Ssor_Total', 'Trip_Distance', 'Trip_Time_journey', 'Turbo_Boost_And_Vcm_Gauge'
+]
+
+rename_mapping = {
+    'engine_load': 'Engine_Load',
+    'engine_rpm': 'Engine_RPM',
+    'engine_coolant_temp': 'Engine_Coolant_Temp',
+    'vibration': 'Vibration',
+    'mass_air_flow_rate': 'Mass_Air_Flow_Rate',
+    'engine_oil_temp': 'Engine_Oil_Temp',
+    'throttle_pos_manifold': 'Throttle_Pos_Manifold',
+    'accel_ssor_total': 'Accel_Ssor_Total',
+    'trip_distance': 'Trip_Distance',
+    'trip_time_journey': 'Trip_Time_journey',
+    'turbo_boost_and_vcm_gauge': 'Turbo_Boost_And_Vcm_Gauge',
+    'litres_per_100km_inst': 'Litres_Per_100km_Inst',
+    'overstrain_risk': 'Overstrain_Risk',
+    'heat_dissipation_risk': 'Heat_Dissipation_Risk',
+    'power_failure_risk': 'Power_Failure_Risk',
+    'vehicle_speed_sensor': 'Vehicle_speed_sensor',
+    'co2_in_g_per_km_inst': 'CO2_in_g_per_km_Inst',
+    'condition_score': 'Condition_Score',
+    'speed_gps': 'Speed_GPS'
+}
+
+# Feature order the model is trained on in model/predictive maintenance.ipynb
+MODEL_FEATURES = [
+    'Vehicle_speed_sensor', 'Vibration', 'Engine_Load', 'Engine_Coolant_Temp', 'Engine_RPM',
+    'Mass_Air_Flow_Rate', 'Engine_Oil_Temp', 'Speed_GPS', 'Turbo_Boost_And_Vcm_Gauge',
+    'Trip_Distance', 'Litres_Per_100km_Inst', 'CO2_in_g_per_km_Inst', 'Trip_Time_journey',
+    'Condition_Score', 'Overstrain_Risk', 'Heat_Dissipation_Risk', 'Power_Failure_Risk'
+]
+
+# Columns computed from the scaled inputs rather than read from the vehicle record
+DERIVED_FEATURES = ['Condition_Score', 'Overstrain_Risk', 'Heat_Dissipation_Risk', 'Power_Failure_Risk']
+
+def calculate_condition_score(row):
+    engine_health_score = (row['Engine_Load'] + row['Engine_RPM'] + row['Engine_Coolant_Temp']) / 3
+    usage_severity = row['Engine_Load'] * (row['Trip_Distance'] + row['Trip_Time_journey'])
+    anomaly_flag = ((row['Vibration'] > 0.7) | (row['Engine_Coolant_Temp'] > 0.8)).astype(int)
+    condition_score = 0.5 * engine_health_score + 0.3 * usage_severity + 0.2 * anomaly_flag
+    return condition_score
+
+def calc_risk(df):
+    df.loc[:, 'Overstrain_Risk'] = 0.5 * df['Engine_Load'] + 0.5 * df['Engine_RPM']
+    df.loc[:, 'Heat_Dissipation_Risk'] = 0.4 * df['Engine_Coolant_Temp'] + 0.6 * df['Engine_Oil_Temp']
+    df.loc[:, 'Power_Failure_Risk'] = 0.5 * df['Mass_Air_Flow_Rate'] + 0.5 * df['Turbo_Boost_And_Vcm_Gauge']
+
+def assign_priority(condition_score) -> np.ndarray:
+    """The notebook's Critical/Moderate/Low bands on Condition_Score, for a whole column at once."""
+    score = np.asarray(condition_score, dtype=np.float64)
+    return np.select([score > 0.70, score > 0.45], ['Critical', 'Moderate'], default='Low').astype(object)
+
+def build_feature_frame(df: pd.DataFrame, scaler, feature_names) -> pd.DataFrame:
+    """Scales and derives the model features one scaler at a time.
+
+    This is the reference path FeatureTransform is checked against.
+    """
+    features = df.copy()
+    for feature, scaler_obj in scaler.items():
+        if feature in features.columns:
+            features[feature] = scaler_obj.transform(features[[feature]])
+
+    features['Condition_Score'] = calculate_condition_score(features)
+    calc_risk(features)
+    return features[list(feature_names)]
+
+
+class FeatureTransform:
+    """The dict of per-feature MinMaxScalers compiled into one scale/offset vector.
+
+    Scaling, Condition_Score and the calc_risk columns are applied with plain
+    NumPy ufuncs in the same operation order as build_feature_frame, so the
+    float64 output is bit-for-bit identical to the reference path.
+    """
+
+    def __init__(self, scaler, feature_names, dtype=np.float64):
+        self.feature_names = list(feature_names)
+        self.dtype = np.dtype(dtype)
+
+        # Raw columns read from the vehicle records: every non-derived model
+        # feature plus whatever the derived columns are computed from
+        inputs = [f for f in self.feature_names if f not in DERIVED_FEATURES]
+        for name in ('Engine_Load', 'Engine_RPM', 'Engine_Coolant_Temp', 'Vibration', 'Trip_Distance',
+                     'Trip_Time_journey', 'Engine_Oil_Temp', 'Mass_Air_Flow_Rate', 'Turbo_Boost_And_Vcm_Gauge'):
+            if name not in inputs:
+                inputs.append(name)
+        self.input_columns = inputs
+
+        self.scale = np.ones(len(inputs))
+        self.offset = np.zeros(len(inputs))
+        self.scaled = np.zeros(len(inputs), dtype=bool)
+        self.clip = np.zeros(len(inputs), dtype=bool)
+        self.clip_min = np.full(len(inputs), -np.inf)
+        self.clip_max = np.full(len(inputs), np.inf)
+        for i, feature in enumerate(inputs):
+            scaler_obj = scaler.get(feature)
+            if scaler_obj is None:
+                continue
+            self.scale[i] = scaler_obj.scale_[0]
+            self.offset[i] = scaler_obj.min_[0]
+            self.scaled[i] = True
+            if getattr(scaler_obj, 'clip', False):
+                self.clip[i] = True
+                self.clip_min[i], self.clip_max[i] = scaler_obj.feature_range
+
+        self._col = {name: i for i, name in enumerate(inputs)}
+        self._passthrough_out = [i for i, f in enumerate(self.feature_names) if f not in DERIVED_FEATURES]
+        self._passthrough_in = [self._col[self.feature_names[i]] for i in self._passthrough_out]
+        self._derived_out = {f: self.feature_names.index(f) for f in DERIVED_FEATURES if f in self.feature_names}
+
+    def scale_inputs(self, raw: np.ndarray) -> np.ndarray:
+        """Applies the MinMax scaling to a float64 matrix of input_columns, in place."""
+        # x * 1.0 is exact, so unscaled columns only need the offset skipped
+        np.multiply(raw, self.scale, out=raw)
+        np.add(raw, self.offset, out=raw, where=self.scaled)
+        if self.clip.any():
+            np.clip(raw, self.clip_min, self.clip_max, out=raw, where=self.clip)
+        return raw
+
+    def transform(self, df: pd.DataFrame, out: np.ndarray = None) -> np.ndarray:
+        """Writes the model feature matrix for df into out (allocated when not given)."""
+        raw = df[self.input_columns].to_numpy(dtype=np.float64, copy=True)
+        return self.transform_array(raw, out)
+
+    def transform_array(self, raw: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """Same as transform for a float64 matrix already ordered like input_columns; raw is overwritten."""
+        if out is None:
+            out = np.empty((raw.shape[0], len(self.feature_names)), dtype=self.dtype)
+        self.scale_inputs(raw)
+
+        c = {name: raw[:, i] for name, i in self._col.items()}
+        load, rpm, coolant = c['Engine_Load'], c['Engine_RPM'], c['Engine_Coolant_Temp']
+
+        derived = {}
+        if 'Condition_Score' in self._derived_out:
+            engine_health_score = (load + rpm + coolant) / 3
+            usage_severity = load * (c['Trip_Distance'] + c['Trip_Time_journey'])
+            anomaly_flag = ((c['Vibration'] > 0.7) | (coolant > 0.8)).astype(int)
+            derived['Condition_Score'] = 0.5 * engine_health_score + 0.3 * usage_severity + 0.2 * anomaly_flag
+        derived['Overstrain_Risk'] = 0.5 * load + 0.5 * rpm
+        derived['Heat_Dissipation_Risk'] = 0.4 * coolant + 0.6 * c['Engine_Oil_Temp']
+        derived['Power_Failure_Risk'] = 0.5 * c['Mass_Air_Flow_Rate'] + 0.5 * c['Turbo_Boost_And_Vcm_Gauge']
+
+        out[:, self._passthrough_out] = raw[:, self._passthrough_in]
+        for name, position in self._derived_out.items():
+            out[:, position] = derived[name]
+        return out
+
+
+def compile_scalers(scaler, feature_names, dtype=np.float64) -> FeatureTransform:
+    """Turns the scaler.pkl dict into a FeatureTransform aligned with feature_names."""
+    if isinstance(scaler, FeatureTransform) and scaler.feature_names == list(feature_names):
+        return scaler
+    return FeatureTransform(scaler, feature_names, dtype=dtype)
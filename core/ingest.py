@@ -0,0 +1,159 @@
+"""Bulk import of a fleet from a telemetry file in the model/fleet_train.csv schema.
+
+Each truckid becomes one vehicle carrying its latest measurement. Columns
+are validated and cast a whole column at a time, renamed to the vehicles
+table with rename_mapping in reverse, and upserted in batches on
+(user_id, vehicle_id), so importing the same file again updates the fleet
+instead of duplicating it; added_on is only set on vehicles new to the
+fleet. Manuals are stored under their content hash, so
+a PDF shared by many vehicles is uploaded once.
+"""
+import datetime
+import hashlib
+import io
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core import vehicles
+from core.dataset import TIMESTAMP_FORMAT
+from core.features import rename_mapping
+
+logger = logging.getLogger(__name__)
+
+TABLE_COLUMNS = {telemetry: column for column, telemetry in rename_mapping.items()}
+# The vehicles table's NOT NULL telemetry; rows missing any of them are rejected
+REQUIRED_COLUMNS = ["vehicle_speed_sensor", "vibration", "engine_load", "engine_coolant_temp", "engine_rpm"]
+# Optional per-row overrides of the import defaults; "manual" names one of the uploaded PDFs
+DETAIL_COLUMNS = ["brand", "model_name", "last_serviced_date", "manual"]
+ON_CONFLICT = "user_id,vehicle_id"
+
+
+def read_upload(name: str, data: bytes) -> pd.DataFrame:
+    if name.endswith(".parquet"):
+        return pd.read_parquet(io.BytesIO(data))
+    return pd.read_csv(io.BytesIO(data))
+
+
+def manual_name(user_id: str, data: bytes) -> str:
+    return f"{user_id}_{hashlib.sha256(data).hexdigest()}.pdf"
+
+
+def upload_manual(supabase, user_id: str, data: bytes) -> Tuple[str, bool]:
+    """Stores a manual under its content hash unless already there; returns (public URL, uploaded)."""
+    bucket = supabase.storage.from_("manuals")
+    name = manual_name(user_id, data)
+    existing = vehicles.with_retry(lambda: bucket.list("manuals", {"search": name}))
+    uploaded = not any(entry.get("name") == name for entry in existing or [])
+    if uploaded:
+        vehicles.with_retry(lambda: bucket.upload(f"manuals/{name}", data,
+                                                  file_options={"content-type": "application/pdf"}))
+    return bucket.get_public_url(f"manuals/{name}"), uploaded
+
+
+def prepare_vehicles(df: pd.DataFrame, user_id: str, defaults: Dict[str, Any]
+                     ) -> Tuple[pd.DataFrame, List[Tuple[Any, str]]]:
+    """Turns telemetry rows into vehicles table rows, one per truckid.
+
+    Each truck gets its latest measurement with all REQUIRED_COLUMNS
+    numeric. defaults supplies brand, model_name, last_serviced_date and
+    manual for rows without their own. Returns the rows (with a "manual"
+    column still to be resolved to a link) and (truckid, message) for each
+    rejected truck.
+    """
+    if "truckid" not in df.columns:
+        raise ValueError("The file has no truckid column to identify vehicles by")
+    records = df.rename(columns={**TABLE_COLUMNS, "truckid": "vehicle_id", "Region": "region"})
+    telemetry = [column for column in vehicles.TELEMETRY_COLUMNS if column in records.columns]
+    missing = [column for column in REQUIRED_COLUMNS if column not in records.columns]
+    if missing:
+        raise ValueError(f"The file is missing required columns: {', '.join(missing)}")
+
+    out = pd.DataFrame({"user_id": user_id, "vehicle_id": records["vehicle_id"].astype(str).str.strip()},
+                       index=records.index)
+    for column in telemetry:
+        out[column] = pd.to_numeric(records[column], errors="coerce")
+    # Files without a Region column leave the one a vehicle already has
+    if "region" in records.columns:
+        region = pd.to_numeric(records["region"], errors="coerce")
+        out["region"] = region.where(region == region.round()).astype("Int64")
+    for column in DETAIL_COLUMNS:
+        values = records[column] if column in records.columns else pd.Series(np.nan, index=records.index)
+        out[column] = values.where(values.notna() & (values.astype(str).str.strip() != ""), defaults.get(column))
+
+    # The latest complete measurement of each truck describes the vehicle
+    order = pd.DataFrame({"complete": out[REQUIRED_COLUMNS].notna().all(axis=1)}, index=out.index)
+    if "Measurement_timestamp" in records.columns:
+        order["measured"] = pd.to_datetime(records["Measurement_timestamp"], format=TIMESTAMP_FORMAT, errors="coerce")
+    out = out.loc[order.sort_values(list(order.columns), kind="stable", na_position="first").index]
+    out = out.drop_duplicates("vehicle_id", keep="last")
+    out["last_serviced_date"] = pd.to_datetime(out["last_serviced_date"], errors="coerce") \
+                                  .dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+    problems = pd.Series("", index=out.index)
+    for column, message in [*((c, f"{c} is not a number") for c in REQUIRED_COLUMNS),
+                            ("brand", "no brand"), ("model_name", "no model_name"),
+                            ("last_serviced_date", "no valid last_serviced_date")]:
+        problems = problems.where(out[column].notna(), problems + f"{message}; ")
+    problems = problems.where(out["vehicle_id"] != "", problems + "empty truckid; ")
+    bad = problems != ""
+    errors = [(vehicle_id, problem.rstrip("; ")) for vehicle_id, problem in zip(out.loc[bad, "vehicle_id"],
+                                                                                   problems[bad])]
+    return out.loc[~bad], errors
+
+
+def import_fleet(supabase, user_id: str, df: pd.DataFrame, manuals: Dict[str, bytes],
+                 defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Validates, deduplicates and upserts a fleet file for a user.
+
+    manuals maps uploaded PDF file names to their bytes; a row's manual is
+    its "manual" column or defaults["manual"]. Returns counts of vehicles
+    imported and rejected, the rejections, and manuals uploaded or reused.
+    """
+    rows, errors = prepare_vehicles(df, user_id, defaults or {})
+
+    links: Dict[str, Optional[str]] = {}
+    by_digest: Dict[str, str] = {}
+    uploaded = reused = 0
+    for name in rows["manual"].dropna().unique():
+        if name not in manuals:
+            continue
+        digest = hashlib.sha256(manuals[name]).hexdigest()
+        if digest not in by_digest:
+            by_digest[digest], was_uploaded = upload_manual(supabase, user_id, manuals[name])
+            uploaded += was_uploaded
+            reused += not was_uploaded
+        links[name] = by_digest[digest]
+    unknown = rows["manual"].notna() & ~rows["manual"].isin(list(links))
+    errors += [(vehicle_id, f"manual {name} was not uploaded")
+               for vehicle_id, name in zip(rows.loc[unknown, "vehicle_id"], rows.loc[unknown, "manual"])]
+    rows = rows.loc[~unknown]
+
+    now = datetime.datetime.now().isoformat()
+    payload = rows.drop(columns="manual").assign(manual_link=rows["manual"].map(links), score=np.nan,
+                                                 last_modified=now)
+    payload = payload.astype(object).where(payload.notna(), None)
+    # New vehicles get added_on as the Add Vehicle form sets it; vehicles already in the
+    # fleet leave it out, so a re-import keeps the date they were first added
+    vehicles.invalidate(user_id)
+    existing = set(vehicles.fetch_fleet(supabase, user_id, columns=["vehicle_id"])["vehicle_id"])
+    is_new = ~payload["vehicle_id"].isin(existing)
+    # Vehicles without a manual leave manual_link out, keeping the link an earlier import gave them.
+    # Every row of a bulk upsert must have the same keys, hence one upsert per group
+    has_link = payload["manual_link"].notna()
+    written = 0
+    for new in (True, False):
+        for linked in (True, False):
+            group = payload[(is_new == new) & (has_link == linked)]
+            if not linked:
+                group = group.drop(columns="manual_link")
+            if new:
+                group = group.assign(added_on=now)
+            written += vehicles.upsert_rows(supabase, group.to_dict("records"), on_conflict=ON_CONFLICT)
+    vehicles.invalidate(user_id)
+    for vehicle_id, message in errors:
+        logger.warning("Rejected vehicle %s: %s", vehicle_id, message)
+    return {'imported': written, 'rejected': len(errors), 'errors': errors,
+            'manuals_uploaded': uploaded, 'manuals_reused': reused}
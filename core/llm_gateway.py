@@ -0,0 +1,167 @@
+import asyncio
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterator, List, Optional
+
+import httpx
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+MAX_CONNECTIONS = 4
+# Finished answers kept for repeated questions across sessions
+CACHE_MAX_ENTRIES = 1024
+TIMEOUT_SECONDS = 300
+
+
+class Generation:
+    """One answer being generated, readable by any number of threads.
+
+    Iterating yields the tokens from the start, waiting for new ones until
+    the answer is complete; result() blocks for the whole text. Readers that
+    join late replay the tokens already produced, so a streaming and a
+    non-streaming consumer share one generation.
+    """
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = threading.Condition()
+
+    @classmethod
+    def completed(cls, text: str) -> "Generation":
+        generation = cls()
+        generation.tokens.append(text)
+        generation.done = True
+        return generation
+
+    def _append(self, token: str):
+        with self._changed:
+            self.tokens.append(token)
+            self._changed.notify_all()
+
+    def _finish(self, error: BaseException = None):
+        with self._changed:
+            self.error = error
+            self.done = True
+            self._changed.notify_all()
+
+    def __iter__(self) -> Iterator[str]:
+        position = 0
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: len(self.tokens) > position or self.done, timeout=TIMEOUT_SECONDS)
+                tokens = self.tokens[position:]
+                done = self.done
+            position += len(tokens)
+            yield from tokens
+            if done and position == len(self.tokens):
+                if self.error is not None:
+                    raise self.error
+                return
+
+    def result(self) -> str:
+        return "".join(self)
+
+
+class LLMGateway:
+    """Process-wide client for Ollama's /api/generate.
+
+    Requests go through one httpx.AsyncClient connection pool on a
+    background event loop, so Streamlit script threads never hold a socket
+    of their own. Prompts are identified by a caller-supplied key (e.g.
+    manual hash, question, model, temperature): a key already being
+    generated is joined instead of generated again, and finished answers
+    are served from an LRU cache.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_URL, max_connections: int = MAX_CONNECTIONS,
+                 cache_max_entries: int = CACHE_MAX_ENTRIES):
+        self.base_url = base_url
+        self.cache_max_entries = cache_max_entries
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Generation] = {}
+        self._cache: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'generations': 0}
+
+        self._loop = asyncio.new_event_loop()
+        self._client: Optional[httpx.AsyncClient] = None
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=TIMEOUT_SECONDS)
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, name="llm-gateway", daemon=True).start()
+        ready.wait()
+
+    def submit(self, prompt: str, key: Hashable, model: str, temperature: float = 0.3,
+               num_ctx: int = 2048) -> Generation:
+        """Starts (or joins, or replays) the generation for key and returns it without waiting."""
+        with self._lock:
+            self.stats['requests'] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats['cache_hits'] += 1
+                return Generation.completed(self._cache[key])
+            generation = self._in_flight.get(key)
+            if generation is not None:
+                self.stats['coalesced'] += 1
+                return generation
+            generation = Generation()
+            self._in_flight[key] = generation
+            self.stats['generations'] += 1
+
+        payload = {"model": model, "prompt": prompt, "stream": True,
+                   "options": {"temperature": temperature, "num_ctx": num_ctx}}
+        asyncio.run_coroutine_threadsafe(self._generate(key, payload, generation), self._loop)
+        return generation
+
+    async def _generate(self, key: Hashable, payload: dict, generation: Generation):
+        error = None
+        try:
+            async with self._client.stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if "error" in data:
+                        raise RuntimeError(data["error"])
+                    if data.get("response"):
+                        generation._append(data["response"])
+                    if data.get("done"):
+                        break
+        except Exception as e:
+            error = e
+
+        with self._lock:
+            del self._in_flight[key]
+            if error is None:
+                self._cache[key] = "".join(generation.tokens)
+                while len(self._cache) > self.cache_max_entries:
+                    self._cache.popitem(last=False)
+        generation._finish(error)
+
+    def generate(self, prompt: str, key: Hashable, model: str, **options) -> str:
+        return self.submit(prompt, key, model, **options).result()
+
+    def stream(self, prompt: str, key: Hashable, model: str, **options) -> Iterator[str]:
+        return iter(self.submit(prompt, key, model, **options))
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Returns the process-wide gateway, shared by every Streamlit session."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+    return _gateway
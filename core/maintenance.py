@@ -0,0 +1,92 @@
+"""Service dates and maintenance urgency for whole columns of vehicles at once.
+
+last_serviced_date arrives as ISO 8601 text ("2024-02-23T00:00:00"), as
+dates, or missing; parse_service_dates turns any of these into datetime64
+in one pass. The rest works on that column: days since service, the
+overdue flag, the next recommended service window, and an urgency score
+combining service age with the predicted failure probabilities.
+"""
+import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Vehicles last serviced longer ago than this are overdue
+SERVICE_INTERVAL = datetime.timedelta(days=365)
+# The recommended window opens this long before a service falls due
+SERVICE_WINDOW = datetime.timedelta(days=30)
+
+# Failure probabilities of a prediction row, as core.scoring names them
+FAILURE_COLUMNS = ['engine_failure', 'overstrain_failure', 'heat_dissipation_failure']
+MAINTENANCE_COLUMNS = ['days_since_service', 'overdue', 'window_start', 'window_end', 'urgency']
+
+
+def parse_service_dates(values) -> pd.Series:
+    """Parses a column of service dates to datetime64[ns], keeping only the date; unparseable values become NaT."""
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        if values.dt.tz is not None:
+            values = values.dt.tz_localize(None)
+        return values.dt.normalize()
+    if pd.api.types.infer_dtype(values, skipna=True) == 'date':
+        # datetime.date objects, as the prediction frames carry them
+        return pd.to_datetime(values, errors='coerce')
+    raw = values.astype('string').str.slice(0, 10)
+    return pd.to_datetime(raw, format='%Y-%m-%d', errors='coerce')
+
+
+def parse_service_date(value) -> Optional[datetime.date]:
+    """The single-value form of parse_service_dates, as a date or None."""
+    parsed = parse_service_dates([value]).iloc[0]
+    return None if pd.isna(parsed) else parsed.date()
+
+
+def as_dates(dates: pd.Series) -> pd.Series:
+    """datetime64 back to datetime.date objects, with None for NaT, as the prediction frames carry them."""
+    return dates.dt.date.astype(object).where(dates.notna(), None)
+
+
+def days_since_service(dates: pd.Series, today: datetime.date = None) -> pd.Series:
+    """Whole days from each parsed service date to today; NaN where the date is unknown."""
+    today = pd.Timestamp(today or datetime.date.today())
+    return (today - dates).dt.days.astype(float)
+
+
+def is_overdue(dates: pd.Series, today: datetime.date = None) -> pd.Series:
+    """True where the last service is more than SERVICE_INTERVAL ago; unknown dates are not overdue."""
+    today = pd.Timestamp(today or datetime.date.today())
+    return dates < today - SERVICE_INTERVAL
+
+
+def maintenance_plan(predictions: pd.DataFrame, today: datetime.date = None) -> pd.DataFrame:
+    """Days since service, overdue flag, next service window and urgency for each prediction row.
+
+    The window ends when the service falls due (SERVICE_INTERVAL after the
+    last one) and opens SERVICE_WINDOW earlier; overdue vehicles, and
+    vehicles without a known service date, get the window starting today.
+    urgency in [0, 1] combines the highest failure probability p with the
+    service pressure s (0 just after a service, 0.5 when due, 1 at twice the
+    interval or more) as 1 - (1 - p)(1 - s), so either alone can make a
+    vehicle urgent and both together make it more so.
+    """
+    # Whole-day datetime64 arrays: pandas' per-call overhead dominates the small frames of the cards
+    today = np.datetime64(pd.Timestamp(today or datetime.date.today()).date(), 'D')
+    dates = parse_service_dates(predictions['last_serviced_date']).to_numpy().astype('datetime64[D]')
+    interval = np.timedelta64(SERVICE_INTERVAL.days, 'D')
+    window = np.timedelta64(SERVICE_WINDOW.days, 'D')
+    days = np.where(np.isnat(dates), np.nan, (today - dates).astype(np.float64))
+
+    due = dates + interval
+    window_end = np.where(due > today, due, today + window)
+    window_start = np.maximum(window_end - window, today)
+
+    pressure = np.clip(np.nan_to_num(days) / (2 * SERVICE_INTERVAL.days), 0.0, 1.0)
+    risk = predictions[FAILURE_COLUMNS].to_numpy(dtype=np.float64).max(axis=1)
+    return pd.DataFrame({
+        'days_since_service': days,
+        'overdue': dates < today - interval,
+        'window_start': window_start.astype('datetime64[ns]'),
+        'window_end': window_end.astype('datetime64[ns]'),
+        'urgency': 1.0 - (1.0 - risk) * (1.0 - pressure),
+    }, index=predictions.index)
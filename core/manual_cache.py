@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from core.manual_index import ManualIndex
+
+CACHE_DIR = os.getenv("MANUAL_CACHE_DIR", ".manual_cache")
+# Upper bound on the PDFs, texts and indexes kept on disk across all manuals
+CACHE_MAX_BYTES = int(os.getenv("MANUAL_CACHE_MAX_BYTES", 512 * 2**20))
+# How long a storage path is trusted to still hold the content it was downloaded with
+PATH_TTL_SECONDS = 24 * 3600
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+class ManualEntry:
+    """One manual in the cache, addressed by the sha256 of its PDF."""
+
+    def __init__(self, path: str, digest: str, lock: threading.Lock):
+        self.path = path
+        self.digest = digest
+        self.pdf_path = os.path.join(path, "manual.pdf")
+        # Held while the index is built, so concurrent callers wait for one build
+        self._lock = lock
+
+    def index(self, embed_documents: Callable[[List[str]], List[List[float]]], embedding_model: str,
+              iter_pages: Callable[[str], Iterable[str]]) -> ManualIndex:
+        """The manual's chunk index, built on first use while iter_pages is still parsing the PDF."""
+        path = os.path.join(self.path, "index", embedding_model)
+        with self._lock:
+            if os.path.exists(os.path.join(path, "chunks.json")):
+                return ManualIndex.load(path)
+
+            text = self._cached_text()
+            if text is not None:
+                index = ManualIndex.build_streaming([text], embed_documents)
+            else:
+                pages: List[str] = []
+                index = ManualIndex.build_streaming(self._collect(iter_pages(self.pdf_path), pages), embed_documents)
+                self._save_text("\n".join(pages))
+            index.save(path)
+            return index
+
+    @staticmethod
+    def _collect(pages: Iterable[str], into: List[str]) -> Iterator[str]:
+        for page in pages:
+            into.append(page)
+            yield page
+
+    def _cached_text(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.path, "text.txt"), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _save_text(self, text: str):
+        if text:
+            _write_atomic(os.path.join(self.path, "text.txt"), text.encode("utf-8"))
+
+
+class ManualCache:
+    """On-disk cache of vehicle manuals shared by every session and vehicle.
+
+    Storage paths map to the sha256 of their content, and everything derived
+    from a PDF (text, chunk index) lives next to it under that hash, so a
+    manual uploaded for several vehicles is downloaded and parsed once.
+    Least recently used manuals are evicted past max_bytes.
+    """
+
+    def __init__(self, path: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        os.makedirs(os.path.join(path, "paths"), exist_ok=True)
+        os.makedirs(os.path.join(path, "content"), exist_ok=True)
+
+    def _path_record(self, storage_path: str) -> str:
+        key = hashlib.sha256(storage_path.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, "paths", f"{key}.json")
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _entry(self, digest: str) -> ManualEntry:
+        return ManualEntry(os.path.join(self.path, "content", digest), digest, self._key_lock(digest))
+
+    def fetch(self, storage_path: str, download: Callable[[], bytes]) -> ManualEntry:
+        """Returns the cached manual stored at storage_path, calling download() only on a miss.
+
+        Concurrent fetches of one path share a single download.
+        """
+        record = self._path_record(storage_path)
+        with self._key_lock(record):
+            digest = self._lookup(record)
+            if digest is not None:
+                entry = self._entry(digest)
+                try:
+                    os.utime(entry.path)
+                    return entry
+                except FileNotFoundError:
+                    pass  # evicted since the lookup: download it again
+
+            data = download()
+            digest = hashlib.sha256(data).hexdigest()
+            entry = self._entry(digest)
+            if os.path.exists(entry.pdf_path):
+                os.utime(entry.path)
+            else:
+                os.makedirs(entry.path, exist_ok=True)
+                _write_atomic(entry.pdf_path, data)
+            _write_atomic(record, json.dumps({"sha256": digest, "fetched_at": time.time()}).encode("utf-8"))
+            self.evict(keep=digest)
+        return entry
+
+    def _lookup(self, record: str) -> Optional[str]:
+        try:
+            with open(record, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - cached["fetched_at"] > PATH_TTL_SECONDS:
+            return None
+        if not os.path.exists(self._entry(cached["sha256"]).pdf_path):
+            return None
+        return cached["sha256"]
+
+    def evict(self, keep: str = None):
+        """Removes the least recently used manuals until the cache fits in max_bytes."""
+        content = os.path.join(self.path, "content")
+        with self._lock:
+            entries = [(os.path.getmtime(os.path.join(content, digest)), digest) for digest in os.listdir(content)]
+            sizes = {digest: _dir_size(os.path.join(content, digest)) for _, digest in entries}
+            total = sum(sizes.values())
+            for _, digest in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if digest == keep:
+                    continue
+                shutil.rmtree(os.path.join(content, digest), ignore_errors=True)
+                total -= sizes[digest]
+
+
+def fetch_manual(supabase, manual_link: str) -> ManualEntry:
+    """The cached manual behind a vehicle's manual_link, downloaded from the manuals bucket on a miss."""
+    # Extract file name and remove query params if present
+    file_name = manual_link.split("/")[-1].split("?")[0]
+    storage_path = f"manuals/{file_name}"
+    return get_manual_cache().fetch(storage_path, lambda: supabase.storage.from_("manuals").download(storage_path))
+
+
+_cache: Optional[ManualCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_manual_cache() -> ManualCache:
+    """Returns the process-wide manual cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ManualCache()
+    return _cache
@@ -0,0 +1,101 @@
+import json
+import os
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+# ~250 tokens per chunk, so TOP_K chunks and the question fit Ollama's num_ctx of 2048
+CHUNK_CHARS = 1000
+CHUNK_OVERLAP = 150
+TOP_K = 4
+# Chunks sent to the embedder per call while a manual is being indexed
+EMBED_BATCH_SIZE = 32
+
+
+def iter_chunks(texts: Iterable[str], chunk_chars: int = CHUNK_CHARS,
+                overlap: int = CHUNK_OVERLAP) -> Iterator[str]:
+    """Packs whole words into chunks of about chunk_chars, each repeating ~overlap chars of the last.
+
+    texts (e.g. the pages of a manual) are consumed lazily, so chunks come
+    out while later pages are still being parsed.
+    """
+    words: List[str] = []
+    for text in texts:
+        words.extend(text.split())
+        while True:
+            end, size = 0, 0
+            while end < len(words) and (end == 0 or size + len(words[end]) < chunk_chars):
+                size += len(words[end]) + 1
+                end += 1
+            if end == len(words):
+                break  # may still grow with the next text
+            yield " ".join(words[:end])
+            # Step back over the trailing words that fit in the overlap
+            back, size = end, 0
+            while back > 1 and size + len(words[back - 1]) < overlap:
+                back -= 1
+                size += len(words[back]) + 1
+            words = words[back:]
+    if words:
+        yield " ".join(words)
+
+
+class ManualIndex:
+    """Embedded chunks of one manual, searchable by cosine similarity.
+
+    Stored on disk as chunks.json plus a row-normalised float32 matrix in
+    embeddings.npy, so a manual is only embedded once.
+    """
+
+    def __init__(self, chunks: List[str], embeddings: np.ndarray):
+        self.chunks = chunks
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.embeddings = matrix / np.where(norms == 0, 1, norms)
+
+    @classmethod
+    def build_streaming(cls, pages: Iterable[str], embed_documents: Callable[[List[str]], List[List[float]]],
+                        batch_size: int = EMBED_BATCH_SIZE) -> "ManualIndex":
+        """Builds the index while pages are still arriving, embedding chunks batch_size at a time."""
+        chunks: List[str] = []
+        embeddings = []
+        batch: List[str] = []
+        for chunk in iter_chunks(pages):
+            batch.append(chunk)
+            if len(batch) == batch_size:
+                embeddings.extend(embed_documents(batch))
+                chunks.extend(batch)
+                batch = []
+        if batch:
+            embeddings.extend(embed_documents(batch))
+            chunks.extend(batch)
+        return cls(chunks, np.asarray(embeddings, dtype=np.float32) if chunks else np.empty((0, 0)))
+
+    @classmethod
+    def load(cls, path: str) -> "ManualIndex":
+        with open(os.path.join(path, "chunks.json"), encoding="utf-8") as f:
+            chunks = json.load(f)
+        return cls(chunks, np.load(os.path.join(path, "embeddings.npy")))
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "embeddings.npy"), self.embeddings)
+        # Written last: its presence marks a complete index
+        with open(os.path.join(path, "chunks.json"), "w", encoding="utf-8") as f:
+            json.dump(self.chunks, f)
+
+    def search(self, query_embedding, k: int = TOP_K) -> List[str]:
+        """Returns the k chunks closest to the query, best first, in one matrix-vector product."""
+        if not self.chunks:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        scores = self.embeddings @ (query / (np.linalg.norm(query) or 1))
+        k = min(k, len(self.chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [self.chunks[i] for i in top[np.argsort(-scores[top])]]
+
+
+def build_context(index: ManualIndex, query_embedding, k: int = TOP_K) -> Optional[str]:
+    """The top-k chunks closest to an embedded question, joined for the prompt's {context}."""
+    chunks = index.search(query_embedding, k)
+    return "\n\n".join(chunks) if chunks else None
@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List
+
+import fitz  # PyMuPDF
+
+# Below this many pages the pool's task round trips cost more than they save
+PARALLEL_MIN_PAGES = 64
+PAGES_PER_TASK = 16
+
+
+def _extract_range(path: str, start: int, stop: int) -> List[str]:
+    with fitz.open(path) as doc:
+        return [doc[number].get_text("text") for number in range(start, stop)]
+
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """The process-wide pool of this many workers, so their spawn and imports are paid once per process."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+        return pool
+
+
+def iter_pages(path: str, workers: int = None) -> Iterator[str]:
+    """Yields the text of every non-blank page in order, as soon as it is parsed.
+
+    Each page is read once. Large documents are split into runs of
+    PAGES_PER_TASK pages, at most two runs per worker ahead of the consumer.
+    The first run is parsed here while the rest go to a long-lived process
+    pool, so the first page is ready as soon as it would be serially, even
+    while the pool is still starting. The pool's workers are spawned rather
+    than forked, since this runs on the app's threads, and forking a
+    process with other threads running can deadlock the child.
+    """
+    workers = workers or os.cpu_count() or 1
+    with fitz.open(path) as doc:
+        page_count = len(doc)
+        parallel = page_count >= PARALLEL_MIN_PAGES and workers > 1
+        if parallel:
+            pool = _get_pool(workers)
+            ranges = ((start, min(start + PAGES_PER_TASK, page_count))
+                      for start in range(PAGES_PER_TASK, page_count, PAGES_PER_TASK))
+            pending = deque(pool.submit(_extract_range, path, start, stop)
+                            for _, (start, stop) in zip(range(2 * workers), ranges))
+        for number in range(PAGES_PER_TASK if parallel else page_count):
+            text = doc[number].get_text("text")
+            if text.strip():
+                yield text
+    if not parallel:
+        return
+
+    try:
+        while pending:
+            texts = pending.popleft().result()
+            following = next(ranges, None)
+            if following:
+                pending.append(pool.submit(_extract_range, path, *following))
+            yield from (text for text in texts if text.strip())
+    except BrokenProcessPool:
+        # A worker died; the next call starts a fresh pool
+        with _pools_lock:
+            if _pools.get(workers) is pool:
+                del _pools[workers]
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
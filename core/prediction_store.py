@@ -0,0 +1,187 @@
+import datetime
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from core import maintenance
+
+STORE_PATH = os.getenv("PREDICTION_STORE_PATH", "predictions.sqlite3")
+
+PREDICTION_COLUMNS = ['prediction', 'engine_failure', 'overstrain_failure',
+                      'heat_dissipation_failure', 'prediction_score', 'condition_score', 'priority']
+
+# SQLite's default limit on host parameters per statement is 999 on older builds
+_MAX_PARAMS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    user_id TEXT NOT NULL,
+    vehicle_id TEXT NOT NULL,
+    last_modified TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    prediction INTEGER,
+    engine_failure REAL,
+    overstrain_failure REAL,
+    heat_dissipation_failure REAL,
+    prediction_score REAL,
+    condition_score REAL,
+    priority TEXT,
+    region INTEGER,
+    last_serviced_date TEXT,
+    PRIMARY KEY (user_id, vehicle_id)
+)
+"""
+
+# B-tree indexes keep the fleet ordered by risk, by band and region, and by service date, so a
+# rescored vehicle costs O(log n) to reposition and each query reads only the rows it returns
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS predictions_by_score "
+    "ON predictions (user_id, model_version, prediction_score DESC)",
+    "CREATE INDEX IF NOT EXISTS predictions_by_priority "
+    "ON predictions (user_id, model_version, priority, region, prediction_score DESC)",
+    "CREATE INDEX IF NOT EXISTS predictions_by_service "
+    "ON predictions (user_id, model_version, last_serviced_date)",
+]
+# Kept next to each prediction for the priority queries
+INDEX_COLUMNS = ['region', 'last_serviced_date']
+
+
+class PredictionStore:
+    """Local SQLite cache of model outputs keyed on (user, vehicle).
+
+    A cached prediction is reused only while both the vehicle's last_modified
+    stamp and the model version are the ones it was computed with. The same
+    rows, indexed, answer the fleet-wide priority queries (top_k, by_priority,
+    overdue) for one model version without scoring anything.
+    """
+
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # The store is only a cache, so a file from an older layout is simply rebuilt
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(predictions)")}
+            if columns and not {*PREDICTION_COLUMNS, *INDEX_COLUMNS} <= columns:
+                self._conn.execute("DROP TABLE predictions")
+            self._conn.execute(_SCHEMA)
+            for index in _INDEXES:
+                self._conn.execute(index)
+
+    def lookup(self, user_id: str, records: pd.DataFrame, model_version: str) -> pd.DataFrame:
+        """Returns the still-valid cached predictions for records, indexed like records."""
+        keys = records[['vehicle_id', 'last_modified']].dropna().astype(str)
+        keys['row'] = keys.index
+        found = []
+        vehicle_ids = keys['vehicle_id'].astype(str).unique().tolist()
+        with self._lock:
+            for start in range(0, len(vehicle_ids), _MAX_PARAMS):
+                chunk = vehicle_ids[start:start + _MAX_PARAMS]
+                found.append(pd.read_sql_query(
+                    f"SELECT vehicle_id, last_modified, {', '.join(PREDICTION_COLUMNS)} FROM predictions "
+                    f"WHERE user_id = ? AND model_version = ? AND vehicle_id IN ({', '.join('?' * len(chunk))})",
+                    self._conn, params=[user_id, model_version, *chunk]))
+
+        cached = pd.concat(found, ignore_index=True) if found else pd.DataFrame(
+            columns=['vehicle_id', 'last_modified', *PREDICTION_COLUMNS])
+        merged = keys.merge(cached, on=['vehicle_id', 'last_modified'])
+        hits = merged.set_index('row')[PREDICTION_COLUMNS]
+        hits.index.name = records.index.name
+
+        with self._lock:
+            self.hits += len(hits)
+            self.misses += len(records) - len(hits)
+        return hits
+
+    def save(self, user_id: str, records: pd.DataFrame, predictions: pd.DataFrame, model_version: str):
+        """Stores predictions (indexed like records) for the vehicles that have a last_modified stamp.
+
+        The vehicle's region comes from records and its last_serviced_date
+        from predictions (as score_fleet parses it), when present.
+        """
+        rows = records.loc[predictions.index, ['vehicle_id', 'last_modified']].join(predictions[PREDICTION_COLUMNS])
+        rows['region'] = records.loc[predictions.index, 'region'] if 'region' in records.columns else None
+        serviced = predictions['last_serviced_date'] if 'last_serviced_date' in predictions.columns else None
+        rows['last_serviced_date'] = maintenance.parse_service_dates(serviced).dt.strftime('%Y-%m-%d').to_numpy() \
+            if serviced is not None else None
+        rows = rows.dropna(subset=['vehicle_id', 'last_modified'])
+        if rows.empty:
+            return
+        rows = rows.astype(object).where(rows.notna(), None)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions (user_id, vehicle_id, last_modified, model_version, "
+                f"{', '.join(PREDICTION_COLUMNS)}, {', '.join(INDEX_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (4 + len(PREDICTION_COLUMNS) + len(INDEX_COLUMNS)))})",
+                [(user_id, str(r.vehicle_id), str(r.last_modified), model_version, int(r.prediction),
+                  float(r.engine_failure), float(r.overstrain_failure), float(r.heat_dissipation_failure),
+                  float(r.prediction_score), float(r.condition_score), r.priority,
+                  None if r.region is None else int(r.region), r.last_serviced_date) for r in rows.itertuples()])
+
+    def forget(self, user_id: str, vehicle_ids):
+        """Drops the predictions of deleted vehicles, so the priority queries stop returning them."""
+        vehicle_ids = [str(v) for v in vehicle_ids]
+        with self._lock, self._conn:
+            for start in range(0, len(vehicle_ids), _MAX_PARAMS):
+                chunk = vehicle_ids[start:start + _MAX_PARAMS]
+                self._conn.execute(
+                    f"DELETE FROM predictions WHERE user_id = ? AND vehicle_id IN ({', '.join('?' * len(chunk))})",
+                    [user_id, *chunk])
+
+    def top_k(self, user_id: str, model_version: str, k: int) -> pd.DataFrame:
+        """The k vehicles with the highest prediction_score, riskiest first."""
+        return self._query("WHERE user_id = ? AND model_version = ? ORDER BY prediction_score DESC LIMIT ?",
+                           [user_id, model_version, k])
+
+    def by_priority(self, user_id: str, model_version: str, priority: str = 'Critical',
+                    region: Optional[int] = None, limit: int = -1) -> pd.DataFrame:
+        """The vehicles in a priority band, optionally of one region, riskiest first."""
+        where, params = "WHERE user_id = ? AND model_version = ? AND priority = ?", [user_id, model_version, priority]
+        if region is not None:
+            where, params = where + " AND region = ?", params + [int(region)]
+        return self._query(f"{where} ORDER BY prediction_score DESC LIMIT ?", params + [limit])
+
+    def overdue(self, user_id: str, model_version: str, serviced_before: datetime.date,
+                limit: int = -1) -> pd.DataFrame:
+        """The vehicles last serviced before the given date, longest overdue first."""
+        return self._query("WHERE user_id = ? AND model_version = ? AND last_serviced_date < ? "
+                           "ORDER BY last_serviced_date LIMIT ?",
+                           [user_id, model_version, serviced_before.isoformat(), limit])
+
+    def regions(self, user_id: str, model_version: str) -> List[int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT region FROM predictions WHERE user_id = ? AND model_version = ? "
+                "AND region IS NOT NULL ORDER BY region", [user_id, model_version]).fetchall()
+        return [row[0] for row in rows]
+
+    def _query(self, clause: str, params: List[Any]) -> pd.DataFrame:
+        with self._lock:
+            rows = pd.read_sql_query(
+                f"SELECT vehicle_id, {', '.join(PREDICTION_COLUMNS)}, {', '.join(INDEX_COLUMNS)} "
+                f"FROM predictions {clause}", self._conn, params=params)
+        rows['last_serviced_date'] = maintenance.as_dates(maintenance.parse_service_dates(rows['last_serviced_date']))
+        return rows
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
+
+
+_store: Optional[PredictionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> PredictionStore:
+    """Returns the process-wide prediction store, shared by every Streamlit session."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PredictionStore()
+    return _store
@@ -0,0 +1,157 @@
+import json
+import os
+import pickle
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from core.features import FeatureTransform, compile_scalers
+from core.maintenance import FAILURE_COLUMNS
+from core.tree_eval import CompiledBooster
+
+MODEL_PATH = os.getenv("MODEL_PATH", "lgbm.pkl")
+SCALER_PATH = os.getenv("SCALER_PATH", "scaler.pkl")
+
+# Up to this many rows the NumPy tree evaluator beats LightGBM's per-call overhead
+# (see benchmarks/bench_tree_eval.py)
+COMPILED_MAX_ROWS = 16
+
+# The failure probability column of each class core.train labels; No Failure has none
+CLASS_COLUMNS = {'Power Failure': 'engine_failure', 'Overstrain Failure': 'overstrain_failure',
+                 'Heat Dissipation Failure': 'heat_dissipation_failure'}
+NO_FAILURE = 'No Failure'
+
+# Process-wide cache shared by every Streamlit session, keyed on the file versions
+_cache: Dict[Tuple[str, str], "ModelBundle"] = {}
+_lock = threading.Lock()
+
+
+def load_pickle(file_path):
+    import lightgbm as lgb
+
+    with open(file_path, 'rb') as f:
+        obj = pickle.load(f)
+        if isinstance(obj, dict) and 'model' in obj:
+            obj = obj['model']
+        if isinstance(obj, lgb.Booster):
+            model = lgb.LGBMModel()
+            model._Booster = obj
+            return model
+        return obj
+
+
+def load_artifact(path: str):
+    """Loads the model, scalers and class names of an artifact directory written by core.train."""
+    import lightgbm as lgb
+
+    with open(os.path.join(path, "manifest.json")) as f:
+        classes = json.load(f)['classes']
+    model = lgb.LGBMModel()
+    model._Booster = lgb.Booster(model_file=os.path.join(path, "model.txt"))
+    return model, load_pickle(os.path.join(path, "scaler.pkl")), classes
+
+
+def probability_index(classes: List[str]) -> np.ndarray:
+    """The position among classes of each FAILURE_COLUMNS column's class.
+
+    Raises ValueError unless classes hold exactly the CLASS_COLUMNS failure
+    types, optionally with NO_FAILURE, so probabilities are never stored
+    under another failure's column.
+    """
+    unknown = [name for name in classes if name not in CLASS_COLUMNS and name != NO_FAILURE]
+    missing = [name for name in CLASS_COLUMNS if name not in classes]
+    if unknown or missing or len(set(classes)) != len(classes):
+        raise ValueError(f"Model classes {classes} do not match the failure columns "
+                         f"{FAILURE_COLUMNS} (unknown: {unknown}, missing: {missing})")
+    column_class = {column: name for name, column in CLASS_COLUMNS.items()}
+    return np.array([classes.index(column_class[column]) for column in FAILURE_COLUMNS])
+
+
+def is_artifact(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, "manifest.json"))
+
+
+def file_version(path: str) -> str:
+    """Identifies one version of a file on disk by its mtime and size."""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+class ModelBundle:
+    """A loaded model together with its scalers and compiled feature transform.
+
+    The bundle can be passed to score_fleet in place of the model: small
+    batches are scored by the CompiledBooster, larger ones by LightGBM. Models
+    the CompiledBooster cannot evaluate are scored by LightGBM throughout.
+    probability_index gives the column of predict_proba holding each
+    FAILURE_COLUMNS probability: from the class names of an artifact, or
+    the first columns in order for a pickled model, which carries none.
+    """
+
+    def __init__(self, model, scaler, version: str, classes: List[str] = None):
+        self.model = model
+        self.scaler = scaler
+        self.version = version
+        self.booster = getattr(model, '_Booster', None)
+        if self.booster is None:
+            self.booster = model
+        try:
+            self.compiled = CompiledBooster.from_model(model)
+        except NotImplementedError:
+            # Categorical splits or linear trees: every batch goes to LightGBM
+            self.compiled = None
+        self.feature_name_ = self.booster.feature_name()
+        model_classes = getattr(model, '_classes', None)
+        self.classes_ = np.asarray(model_classes) if model_classes is not None else \
+            np.arange(max(self.booster.num_model_per_iteration(), 2))
+        if classes is None:
+            self.probability_index = np.arange(len(FAILURE_COLUMNS))
+        else:
+            if len(classes) != len(self.classes_):
+                raise ValueError(f"The model has {len(self.classes_)} classes but its manifest names {classes}")
+            self.probability_index = probability_index(classes)
+        self.transform: FeatureTransform = compile_scalers(scaler, self.feature_name_)
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if self.compiled is not None and len(X) <= COMPILED_MAX_ROWS:
+            return self.compiled.predict_proba(X)
+        pred_prob = self.booster.predict(X)
+        if pred_prob.ndim == 1:
+            pred_prob = np.column_stack([1.0 - pred_prob, pred_prob])
+        return pred_prob
+
+
+def get_model(model_path: str = MODEL_PATH, scaler_path: str = SCALER_PATH) -> ModelBundle:
+    """Returns the model bundle, unpickling it only the first time each file version is seen.
+
+    model_path may also be an artifact directory written by core.train, in
+    which case its own scalers are used and scaler_path is ignored.
+    """
+    if is_artifact(model_path):
+        scaler_path = model_path
+        version = file_version(os.path.join(model_path, "manifest.json"))
+    else:
+        version = f"{file_version(model_path)}:{file_version(scaler_path)}"
+    key = (os.path.abspath(model_path), os.path.abspath(scaler_path))
+
+    bundle = _cache.get(key)
+    if bundle is not None and bundle.version == version:
+        return bundle
+
+    with _lock:
+        bundle = _cache.get(key)
+        if bundle is None or bundle.version != version:
+            if is_artifact(model_path):
+                model, scaler, classes = load_artifact(model_path)
+                bundle = ModelBundle(model, scaler, version, classes)
+            else:
+                bundle = ModelBundle(load_pickle(model_path), load_pickle(scaler_path), version)
+            _cache[key] = bundle
+    return bundle
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
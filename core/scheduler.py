@@ -0,0 +1,229 @@
+"""Packs the vehicles that need a workshop visit into bays and days over a planning horizon.
+
+Every vehicle that is overdue, due within the horizon, or likely to fail
+becomes a job: a routine service plus, when a failure is likely, the repair
+of its most probable failure. A job occupies one bay for part of one day.
+Starting a job on day d (0 = the first day) costs
+
+    urgency * d + LATE_WEIGHT * max(0, d - due)
+
+where urgency comes from core.maintenance and due is the day its service
+window closes (0 when already overdue). Jobs that do not fit the horizon
+are costed as if done the day after it. A greedy pass places jobs in order
+of weight per hour at the earliest day with room, then a local search moves
+jobs into earlier gaps and swaps pairs across days while either lowers the
+total cost. Run over a batch score file from the repository root:
+    python -m core.scheduler scores.csv --bays 4 --days 14 --output schedule.csv
+"""
+import argparse
+import datetime
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core import maintenance
+
+# Workshop defaults
+BAYS = 4
+HORIZON_DAYS = 14
+HOURS_PER_DAY = 8.0
+# Hours of a routine service, and of the repair each failure type adds to it
+SERVICE_HOURS = 1.5
+REPAIR_HOURS = {'engine_failure': 6.0, 'overstrain_failure': 3.0, 'heat_dissipation_failure': 4.0}
+# Failure probability from which a repair is booked along with the service
+REPAIR_THRESHOLD = 0.5
+# Cost of each day a job starts after its service window has closed
+LATE_WEIGHT = 1.0
+# Bound on the local search, which otherwise runs until no move improves the schedule
+LOCAL_SEARCH_SECONDS = 5.0
+
+SCHEDULE_COLUMNS = ['vehicle_id', 'date', 'bay', 'start_hour', 'hours', 'work', 'urgency', 'overdue',
+                    'due_date', 'days_late']
+
+
+def build_jobs(predictions: pd.DataFrame, horizon_days: int = HORIZON_DAYS,
+               today: datetime.date = None) -> pd.DataFrame:
+    """One job per vehicle that needs the workshop within the horizon, from prediction rows.
+
+    predictions carries the core.scoring columns; a vehicle listed more than
+    once (as in a batch score file) keeps its last row.
+    """
+    today = pd.Timestamp(today or datetime.date.today())
+    predictions = predictions.drop_duplicates('vehicle_id', keep='last')
+    if 'last_serviced_date' not in predictions.columns:
+        predictions = predictions.assign(last_serviced_date=None)
+    plan = maintenance.maintenance_plan(predictions, today)
+
+    failures = predictions[maintenance.FAILURE_COLUMNS].to_numpy(dtype=np.float64)
+    likely = np.asarray(maintenance.FAILURE_COLUMNS)[failures.argmax(axis=1)]
+    repair = failures.max(axis=1) >= REPAIR_THRESHOLD
+    # Days until the service falls due; vehicles without a known service date are due now
+    due = (maintenance.SERVICE_INTERVAL.days - plan['days_since_service']).clip(lower=0).fillna(0).astype(int)
+    needed = repair | plan['overdue'].to_numpy() | (plan['window_start'] < today + pd.Timedelta(days=horizon_days)).to_numpy()
+
+    jobs = pd.DataFrame({
+        'vehicle_id': predictions['vehicle_id'].to_numpy(),
+        'work': np.where(repair, 'service + ' + pd.Series(likely).str.replace('_', ' ').to_numpy(), 'service'),
+        'hours': SERVICE_HOURS + np.where(repair, pd.Series(likely).map(REPAIR_HOURS).to_numpy(), 0.0),
+        'urgency': plan['urgency'].to_numpy(),
+        'overdue': plan['overdue'].to_numpy(),
+        'due': due.to_numpy(),
+    })
+    return jobs.loc[needed].reset_index(drop=True)
+
+
+def _costs(urgency: np.ndarray, due: np.ndarray, days: np.ndarray) -> np.ndarray:
+    return urgency * days + LATE_WEIGHT * np.maximum(0, days - due)
+
+
+def _greedy(jobs: pd.DataFrame, bays: int, horizon_days: int, hours_per_day: float
+            ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Earliest-fit in order of weight per hour; returns each job's day and bay and the hours left per bay-day."""
+    remaining = np.full((horizon_days, bays), hours_per_day)
+    day = np.full(len(jobs), horizon_days)
+    bay = np.full(len(jobs), -1)
+    hours = jobs['hours'].to_numpy()
+    # The cost a job adds per day of delay once it is due, per hour of bay time it takes
+    weight = (jobs['urgency'].to_numpy() + LATE_WEIGHT * (jobs['due'].to_numpy() == 0)) / hours
+    for job in np.argsort(-weight, kind='stable'):
+        fits = remaining.max(axis=1) >= hours[job]
+        if not fits.any():
+            continue
+        day[job] = int(fits.argmax())
+        # Best fit among that day's bays keeps larger gaps for larger jobs
+        room = remaining[day[job]]
+        bay[job] = int(np.where(room >= hours[job], room, np.inf).argmin())
+        room[bay[job]] -= hours[job]
+    return day, bay, remaining
+
+
+def _local_search(jobs: pd.DataFrame, day: np.ndarray, bay: np.ndarray, remaining: np.ndarray,
+                  horizon_days: int, deadline: float) -> int:
+    """Improves day/bay/remaining in place with moves into earlier gaps and pairwise swaps; returns moves made."""
+    hours = jobs['hours'].to_numpy()
+    urgency = jobs['urgency'].to_numpy()
+    due = jobs['due'].to_numpy()
+    moves = 0
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for a in np.argsort(-urgency, kind='stable'):
+            if day[a] == 0 or time.monotonic() >= deadline:
+                continue
+            cost_a = _costs(urgency[a], due[a], day[a])
+
+            # An earlier bay-day with room is always at least as good
+            room = remaining[:day[a]] >= hours[a]
+            if room.any():
+                new_day = int(room.any(axis=1).argmax())
+                new_bay = int(np.where(room[new_day], remaining[new_day], np.inf).argmin())
+                if _costs(urgency[a], due[a], new_day) < cost_a:
+                    if bay[a] >= 0:
+                        remaining[day[a], bay[a]] += hours[a]
+                    remaining[new_day, new_bay] -= hours[a]
+                    day[a], bay[a] = new_day, new_bay
+                    moves += 1
+                    improved = True
+                    continue
+
+            # Otherwise swap with the job on an earlier day that lowers the total cost most
+            earlier = np.flatnonzero((day < day[a]) & (bay >= 0))
+            if len(earlier) == 0:
+                continue
+            delta = (_costs(urgency[a], due[a], day[earlier]) + _costs(urgency[earlier], due[earlier], day[a])
+                     - cost_a - _costs(urgency[earlier], due[earlier], day[earlier]))
+            fits = remaining[day[earlier], bay[earlier]] + hours[earlier] - hours[a] >= 0
+            if bay[a] >= 0:
+                fits &= remaining[day[a], bay[a]] + hours[a] - hours[earlier] >= 0
+            delta = np.where(fits, delta, np.inf)
+            best = int(delta.argmin())
+            if delta[best] >= -1e-9:
+                continue
+            b = earlier[best]
+            if bay[a] >= 0:
+                remaining[day[a], bay[a]] += hours[a] - hours[b]
+            remaining[day[b], bay[b]] += hours[b] - hours[a]
+            day[a], day[b] = day[b], day[a]
+            bay[a], bay[b] = bay[b], bay[a]
+            moves += 1
+            improved = True
+    return moves
+
+
+def schedule_jobs(jobs: pd.DataFrame, bays: int = BAYS, horizon_days: int = HORIZON_DAYS,
+                  hours_per_day: float = HOURS_PER_DAY, start: datetime.date = None,
+                  time_limit: float = LOCAL_SEARCH_SECONDS) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Assigns jobs (as from build_jobs) to bays and days starting at start.
+
+    Returns one row per job in SCHEDULE_COLUMNS, in date, bay and start
+    order, with date and bay empty for the jobs that did not fit, and
+    statistics comparing the greedy and the final schedule.
+    """
+    too_long = jobs['hours'] > hours_per_day
+    if too_long.any():
+        raise ValueError(f"{int(too_long.sum())} jobs take longer than a {hours_per_day:g} hour workshop day")
+    started = time.monotonic()
+    start = pd.Timestamp(start or datetime.date.today())
+
+    day, bay, remaining = _greedy(jobs, bays, horizon_days, hours_per_day)
+    greedy_cost = float(_costs(jobs['urgency'].to_numpy(), jobs['due'].to_numpy(), day).sum())
+    moves = _local_search(jobs, day, bay, remaining, horizon_days, started + time_limit)
+    cost = float(_costs(jobs['urgency'].to_numpy(), jobs['due'].to_numpy(), day).sum())
+
+    scheduled = bay >= 0
+    result = jobs.assign(day=day, bay=pd.array(np.where(scheduled, bay + 1, np.nan), dtype='Int64'))
+    result = result.sort_values(['day', 'bay', 'urgency'], ascending=[True, True, False], kind='stable')
+    # Within a bay-day the most urgent job goes first
+    result['start_hour'] = result.groupby(['day', 'bay'])['hours'].cumsum() - result['hours']
+    result['date'] = (start + pd.to_timedelta(result['day'], unit='D')).dt.date.where(result['bay'].notna(), None)
+    result['due_date'] = (start + pd.to_timedelta(result['due'], unit='D')).dt.date
+    result['days_late'] = np.maximum(0, result['day'] - result['due']).where(result['bay'].notna(), np.nan)
+    result.loc[result['bay'].isna(), 'start_hour'] = np.nan
+
+    stats = {
+        'jobs': len(jobs), 'scheduled': int(scheduled.sum()), 'unscheduled': int((~scheduled).sum()),
+        'late': int((result['days_late'] > 0).sum()), 'greedy_cost': greedy_cost, 'cost': cost,
+        'moves': moves, 'utilisation': float(jobs.loc[scheduled, 'hours'].sum() / (bays * horizon_days * hours_per_day)),
+        'seconds': time.monotonic() - started,
+    }
+    return result[SCHEDULE_COLUMNS].reset_index(drop=True), stats
+
+
+def plan_workshop(predictions: pd.DataFrame, bays: int = BAYS, horizon_days: int = HORIZON_DAYS,
+                  hours_per_day: float = HOURS_PER_DAY, start: datetime.date = None,
+                  time_limit: float = LOCAL_SEARCH_SECONDS) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """build_jobs followed by schedule_jobs: prediction rows in, workshop schedule and statistics out."""
+    jobs = build_jobs(predictions, horizon_days, start)
+    return schedule_jobs(jobs, bays, horizon_days, hours_per_day, start, time_limit)
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(prog="python -m core.scheduler", description=__doc__.splitlines()[0])
+    parser.add_argument("scores", help="a core.batch score file (.csv or .parquet)")
+    parser.add_argument("--output", help="where to write the schedule (.csv or .parquet); printed if omitted")
+    parser.add_argument("--bays", type=int, default=BAYS)
+    parser.add_argument("--days", type=int, default=HORIZON_DAYS)
+    parser.add_argument("--hours", type=float, default=HOURS_PER_DAY, help="workshop hours per bay and day")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, help="first day, YYYY-MM-DD (default today)")
+    parser.add_argument("--time-limit", type=float, default=LOCAL_SEARCH_SECONDS)
+    args = parser.parse_args(argv)
+
+    scores = pd.read_parquet(args.scores) if args.scores.endswith(".parquet") else pd.read_csv(args.scores)
+    if 'vehicle_id' not in scores.columns:
+        scores = scores.rename(columns={'truckid': 'vehicle_id'})
+    schedule, stats = plan_workshop(scores, args.bays, args.days, args.hours, args.start, args.time_limit)
+    print(f"{stats['scheduled']} of {stats['jobs']} jobs scheduled ({stats['late']} late, "
+          f"{stats['utilisation']:.0%} of bay hours used); cost {stats['greedy_cost']:.1f} greedy, "
+          f"{stats['cost']:.1f} after {stats['moves']} local moves, {stats['seconds']:.2f}s")
+    if args.output is None:
+        print(schedule.to_string(index=False))
+    elif args.output.endswith(".parquet"):
+        schedule.to_parquet(args.output, index=False)
+    else:
+        schedule.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
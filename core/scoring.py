@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Iterable, Iterator, List, Tuple
+
+from core.features import assign_priority, compile_scalers, rename_mapping
+from core import tracing
+from core.maintenance import FAILURE_COLUMNS, as_dates, parse_service_dates
+
+# Probability columns reported for each vehicle, taken from the model's classes by probability_index
+PROBABILITY_COLUMNS = FAILURE_COLUMNS
+
+PREDICTION_COLUMNS = ['vehicle_id', 'prediction', *PROBABILITY_COLUMNS, 'prediction_score',
+                      'condition_score', 'priority', 'last_serviced_date']
+
+
+def _parse_service_dates(df: pd.DataFrame) -> pd.Series:
+    if 'last_serviced_date' not in df.columns:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+    return as_dates(parse_service_dates(df['last_serviced_date']))
+
+
+def _coerce_inputs(df: pd.DataFrame, columns) -> Tuple[pd.DataFrame, List[Tuple[Any, str]]]:
+    """Casts the raw model inputs to float, collecting the rows holding unparseable values."""
+    numeric = df.copy()
+    errors: List[Tuple[Any, str]] = []
+    if all(pd.api.types.is_numeric_dtype(df[column]) for column in columns):
+        numeric[list(columns)] = df[list(columns)].astype(float)
+        return numeric, errors
+    for column in columns:
+        values = pd.to_numeric(df[column], errors='coerce')
+        invalid = values.isna() & df[column].notna()
+        if not invalid.any():
+            numeric[column] = values.astype(float)
+            continue
+        for idx, value in df.loc[invalid, column].items():
+            errors.append((idx, f"could not convert {column}={value!r} to float"))
+        numeric[column] = values.astype(float)
+    return numeric, errors
+
+
+def score_fleet(df: pd.DataFrame, model, scaler) -> Tuple[pd.DataFrame, List[Tuple[Any, str]]]:
+    """Scores every vehicle in df with a single predict_proba call.
+
+    df holds vehicle records already renamed with rename_mapping; scaler is
+    either the scaler.pkl dict or an already compiled FeatureTransform. Returns the
+    predictions (one row per scorable vehicle) and a list of (index, message)
+    for the rows that had to be skipped.
+    """
+    feature_names = list(model.feature_name_)
+    transform = compile_scalers(scaler, feature_names)
+    input_columns = transform.input_columns
+    missing = [f for f in input_columns if f not in df.columns]
+    if missing:
+        raise ValueError(f"Vehicle records are missing model inputs: {', '.join(missing)}")
+
+    numeric, errors = _coerce_inputs(df, input_columns)
+    bad_rows = {idx for idx, _ in errors}
+    valid = numeric.loc[~numeric.index.isin(bad_rows)]
+
+    if valid.empty:
+        return pd.DataFrame(columns=PREDICTION_COLUMNS), errors
+
+    with tracing.span("scoring.transform"):
+        features = transform.transform(valid)
+    return score_features(valid, features, model, transform), errors
+
+
+def score_features(records: pd.DataFrame, features: np.ndarray, model, transform) -> pd.DataFrame:
+    """The predictions of rows whose model features are already computed, e.g. by transform.transform(records).
+
+    records supplies vehicle_id and last_serviced_date for each row of features.
+    A model without a probability_index (see registry.ModelBundle) reports
+    its first classes as PROBABILITY_COLUMNS, in order.
+    """
+    with tracing.span("scoring.predict"):
+        pred_prob = np.asarray(model.predict_proba(features))
+
+    # The class label is the argmax of the probabilities, saving a second predict call
+    best = pred_prob.argmax(axis=1)
+    classes = getattr(model, 'classes_', None)
+    labels = np.asarray(classes)[best] if classes is not None else best
+    index = getattr(model, 'probability_index', range(len(PROBABILITY_COLUMNS)))
+
+    condition_score = features[:, transform.feature_names.index('Condition_Score')]
+    vehicle_ids = records['vehicle_id'] if 'vehicle_id' in records.columns else records.index.to_series()
+    predictions = pd.DataFrame({
+        'vehicle_id': vehicle_ids.to_numpy(),
+        'prediction': labels.astype(int),
+        **{name: pred_prob[:, i] for i, name in zip(index, PROBABILITY_COLUMNS)},
+        'prediction_score': pred_prob.max(axis=1),
+        'condition_score': condition_score,
+        'priority': assign_priority(condition_score),
+        'last_serviced_date': _parse_service_dates(records).to_numpy(),
+    }, index=records.index)
+    return predictions[PREDICTION_COLUMNS]
+
+
+def score_incremental(df: pd.DataFrame, model, scaler, store, user_id: str,
+                      model_version: str) -> Tuple[pd.DataFrame, List[Tuple[Any, str]]]:
+    """Same as score_fleet, but only vehicles whose last_modified or the model changed are rescored.
+
+    store is a PredictionStore; everything else is answered from it and the
+    fresh predictions are written back.
+    """
+    if 'last_modified' not in df.columns or 'vehicle_id' not in df.columns:
+        return score_fleet(df, model, scaler)
+
+    with tracing.span("scoring.store_lookup"):
+        cached = store.lookup(user_id, df, model_version)
+    stale = df.loc[~df.index.isin(cached.index)]
+    fresh, errors = score_fleet(stale, model, scaler) if not stale.empty else (pd.DataFrame(), [])
+    if not fresh.empty:
+        with tracing.span("scoring.store_save"):
+            store.save(user_id, stale, fresh, model_version)
+    if cached.empty:
+        return fresh, errors
+
+    hits = df.loc[cached.index]
+    cached = cached.assign(vehicle_id=hits['vehicle_id'], last_serviced_date=_parse_service_dates(hits))
+    cached = cached[PREDICTION_COLUMNS]
+    predictions = pd.concat([cached, fresh], sort=False) if not fresh.empty else cached
+    return predictions.loc[df.index[df.index.isin(predictions.index)]], errors
+
+
+def stream_top_predictions(pages: Iterable[pd.DataFrame], model, scaler, top_n: int,
+                           store=None, user_id: str = None) -> Iterator[Tuple[pd.DataFrame, int, List[Tuple[Any, str]]]]:
+    """Scores pages of raw vehicle records as they arrive, keeping only the top_n riskiest.
+
+    Yields (top predictions so far, vehicles seen so far, errors of the page)
+    after every page, so memory is bounded by one page plus top_n rows.
+    Errors are reported against vehicle_id rather than the in-page index.
+    With a PredictionStore, unchanged vehicles are served from it (see
+    score_incremental); model.version identifies the model.
+    """
+    transform = compile_scalers(scaler, model.feature_name_)
+    top = pd.DataFrame()
+    seen = 0
+    for page in pages:
+        records = page.rename(columns=rename_mapping)
+        if store is not None:
+            predictions, errors = score_incremental(records, model, transform, store, user_id, model.version)
+        else:
+            predictions, errors = score_fleet(records, model, transform)
+        seen += len(records)
+        if 'vehicle_id' in records.columns:
+            errors = [(records.at[idx, 'vehicle_id'], message) for idx, message in errors]
+
+        if not predictions.empty:
+            top = predictions if top.empty else pd.concat([top, predictions], ignore_index=True)
+            top = top.nlargest(top_n, 'prediction_score')
+        yield top, seen, errors
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+# Cosine similarity above which two questions about the same manual count as the same question
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+TTL_SECONDS = 7 * 24 * 3600
+MAX_ENTRIES = 4096
+
+
+class _Scope:
+    """Cached questions of one manual/model: a normalised vector matrix plus parallel lists."""
+
+    def __init__(self, dim: int):
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.questions: List[str] = []
+        self.answers: List[str] = []
+        self.created: List[float] = []
+        self.used: List[float] = []
+
+    def drop(self, keep: np.ndarray):
+        self.vectors = self.vectors[keep]
+        for name in ('questions', 'answers', 'created', 'used'):
+            setattr(self, name, [value for value, kept in zip(getattr(self, name), keep) if kept])
+
+
+def _normalised(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) or 1)
+
+
+class SemanticCache:
+    """Answers to earlier questions, found by embedding similarity.
+
+    Entries are grouped by scope (e.g. manual hash, model, temperature) and
+    only compared within it. Entries expire after ttl_seconds and the least
+    recently used are evicted past max_entries.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, ttl_seconds: float = TTL_SECONDS,
+                 max_entries: int = MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._scopes: Dict[Hashable, _Scope] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, scope: Hashable, question_embedding) -> Optional[Tuple[str, str, float]]:
+        """Returns (answer, cached question, similarity) of the closest live entry above the threshold."""
+        query = _normalised(question_embedding)
+        now = time.time()
+        with self._lock:
+            entries = self._scopes.get(scope)
+            best = None
+            if entries is not None and entries.questions:
+                similarity = entries.vectors @ query
+                similarity[np.asarray(entries.created) < now - self.ttl_seconds] = -np.inf
+                i = int(similarity.argmax())
+                if similarity[i] >= self.threshold:
+                    entries.used[i] = now
+                    best = (entries.answers[i], entries.questions[i], float(similarity[i]))
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return best
+
+    def add(self, scope: Hashable, question: str, question_embedding, answer: str):
+        vector = _normalised(question_embedding)
+        now = time.time()
+        with self._lock:
+            entries = self._scopes.setdefault(scope, _Scope(len(vector)))
+            if question in entries.questions:
+                i = entries.questions.index(question)
+                entries.answers[i], entries.created[i], entries.used[i] = answer, now, now
+                return
+            entries.vectors = np.vstack([entries.vectors, vector])
+            entries.questions.append(question)
+            entries.answers.append(answer)
+            entries.created.append(now)
+            entries.used.append(now)
+            self._evict(now)
+
+    def _evict(self, now: float):
+        for scope, entries in list(self._scopes.items()):
+            live = np.asarray(entries.created) >= now - self.ttl_seconds
+            if not live.all():
+                entries.drop(live)
+
+        last_used = [(used, scope, i) for scope, entries in self._scopes.items() for i, used in enumerate(entries.used)]
+        if len(last_used) > self.max_entries:
+            evicted = sorted(last_used, key=lambda entry: entry[0])[:len(last_used) - self.max_entries]
+            for scope, entries in self._scopes.items():
+                keep = np.ones(len(entries.questions), dtype=bool)
+                keep[[i for _, evicted_scope, i in evicted if evicted_scope == scope]] = False
+                if not keep.all():
+                    entries.drop(keep)
+
+        for scope in [scope for scope, entries in self._scopes.items() if not entries.questions]:
+            del self._scopes[scope]
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0,
+                'entries': sum(len(entries.questions) for entries in self._scopes.values())}
+
+
+_cache: Optional[SemanticCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Returns the process-wide semantic cache, shared by every Streamlit session."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticCache()
+    return _cache
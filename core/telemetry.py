@@ -0,0 +1,175 @@
+"""Streaming OBD telemetry: rolling per-vehicle windows and drift-triggered rescoring.
+
+Readings arrive in batches shaped like model/fleet_train.csv rows, keyed by
+truckid and Measurement_timestamp. Each vehicle keeps its last `window`
+readings in a ring buffer whose running sums give the window mean in O(1)
+per reading. A vehicle is rescored with score_features, on its window
+means, only when one of its model features has drifted more than
+drift_threshold since it was last scored. benchmarks/replay_telemetry.py
+drives the service from a CSV.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.dataset import TIMESTAMP_FORMAT
+from core.features import rename_mapping
+from core.scoring import PREDICTION_COLUMNS, score_features
+
+logger = logging.getLogger(__name__)
+
+# Readings averaged per vehicle
+WINDOW_SIZE = 32
+# Largest drift of any model feature that does not warrant rescoring. Drift is the change
+# relative to the last scored value, or the absolute change for values below 1 (the
+# MinMax-scaled features and the risks derived from them)
+DRIFT_THRESHOLD = 0.05
+# Batches waiting to be processed before submit() makes producers wait
+MAX_PENDING_BATCHES = 64
+# Batch latencies kept for percentiles; older ones are dropped
+LATENCY_SAMPLES = 10_000
+
+
+class RingBuffer:
+    """The last `size` readings of one vehicle plus their running sum.
+
+    Pushing subtracts the reading that falls out of the window and adds the
+    new one, so the mean costs O(1) per reading; the sum is recomputed
+    every `size` pushes to keep floating point error from accumulating.
+    """
+
+    def __init__(self, size: int, width: int):
+        self.values = np.zeros((size, width))
+        self.sum = np.zeros(width)
+        self.count = 0
+        self.pushes = 0
+        self.last_timestamp = None
+
+    def push(self, reading: np.ndarray):
+        slot = self.pushes % len(self.values)
+        if self.count == len(self.values):
+            self.sum -= self.values[slot]
+        else:
+            self.count += 1
+        self.values[slot] = reading
+        self.sum += reading
+        self.pushes += 1
+        if self.pushes % len(self.values) == 0:
+            self.sum = self.values.sum(axis=0)
+
+    def mean(self) -> np.ndarray:
+        return self.sum / self.count
+
+
+class TelemetryService:
+    """Consumes reading batches from an asyncio queue and keeps every vehicle's prediction current.
+
+    Run run() as a task, feed it with submit(), and stop it with close().
+    The numeric work happens in process(), on a worker thread so the event
+    loop stays responsive; on_scores receives each batch of fresh
+    predictions. process() can also be called directly, without asyncio.
+    """
+
+    def __init__(self, bundle, window: int = WINDOW_SIZE, drift_threshold: float = DRIFT_THRESHOLD,
+                 on_scores: Callable[[pd.DataFrame], Any] = None, max_pending: int = MAX_PENDING_BATCHES):
+        self.bundle = bundle
+        self.window = window
+        self.drift_threshold = drift_threshold
+        self.on_scores = on_scores
+        self.inputs = bundle.transform.input_columns
+        self.predictions: Dict[str, Dict[str, Any]] = {}
+        self._buffers: Dict[str, RingBuffer] = {}
+        # Model features of each vehicle when it was last scored
+        self._scored: Dict[str, np.ndarray] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._max_pending = max_pending
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.stats = {'batches': 0, 'readings': 0, 'invalid': 0, 'stale': 0, 'rescored': 0, 'unchanged': 0}
+
+    def process(self, readings: pd.DataFrame) -> pd.DataFrame:
+        """Adds a batch of readings to the windows and returns the predictions of the vehicles that drifted."""
+        records = readings.rename(columns=rename_mapping)
+        try:
+            values = records[self.inputs].astype(np.float64)
+        except (TypeError, ValueError):
+            values = records[self.inputs].apply(pd.to_numeric, errors='coerce')
+        timestamps = records['Measurement_timestamp']
+        if not pd.api.types.is_datetime64_any_dtype(timestamps):
+            timestamps = pd.to_datetime(timestamps, format=TIMESTAMP_FORMAT, errors='coerce')
+        valid = values.notna().all(axis=1) & timestamps.notna() & records['truckid'].notna()
+        self.stats['batches'] += 1
+        self.stats['readings'] += len(records)
+        self.stats['invalid'] += int((~valid).sum())
+
+        order = np.argsort(timestamps[valid].to_numpy(), kind='stable')
+        matrix = values[valid].to_numpy(dtype=np.float64)[order]
+        trucks = records.loc[valid, 'truckid'].astype(str).to_numpy()[order]
+        stamps = timestamps[valid].to_numpy()[order]
+
+        touched: Dict[str, RingBuffer] = {}
+        for truck, stamp, reading in zip(trucks, stamps, matrix):
+            buffer = self._buffers.get(truck)
+            if buffer is None:
+                buffer = self._buffers[truck] = RingBuffer(self.window, len(self.inputs))
+            elif stamp <= buffer.last_timestamp:
+                # Replayed or out of order: the window already moved past it
+                self.stats['stale'] += 1
+                continue
+            buffer.push(reading)
+            buffer.last_timestamp = stamp
+            touched[truck] = buffer
+        if not touched:
+            return pd.DataFrame(columns=PREDICTION_COLUMNS)
+
+        vehicle_ids = list(touched)
+        window = pd.DataFrame(np.vstack([touched[v].mean() for v in vehicle_ids]), columns=self.inputs)
+        window['vehicle_id'] = vehicle_ids
+        features = self.bundle.transform.transform(window)
+        previous = np.vstack([self._scored.get(v, np.full(features.shape[1], np.nan)) for v in vehicle_ids])
+        drift = (np.abs(features - previous) / np.maximum(np.abs(previous), 1.0)).max(axis=1)
+        due = ~(drift <= self.drift_threshold)
+        self.stats['unchanged'] += int((~due).sum())
+        if not due.any():
+            return pd.DataFrame(columns=PREDICTION_COLUMNS)
+
+        # window holds the raw window means (only vehicle_id and last_serviced_date are read from it);
+        # features is their transform.transform output, scored as is rather than scaled a second time
+        predictions = score_features(window.loc[due], features[due], self.bundle, self.bundle.transform)
+        for idx in predictions.index:
+            self._scored[window.at[idx, 'vehicle_id']] = features[idx]
+        self.predictions.update(zip(predictions['vehicle_id'], predictions.to_dict('records')))
+        self.stats['rescored'] += len(predictions)
+        return predictions
+
+    async def submit(self, readings: pd.DataFrame):
+        """Queues a batch, waiting while MAX_PENDING_BATCHES are already queued."""
+        await self._get_queue().put((time.perf_counter(), readings))
+
+    async def close(self):
+        """Lets run() return once the batches queued so far are processed."""
+        await self._get_queue().put((None, None))
+
+    async def run(self):
+        queue = self._get_queue()
+        while True:
+            submitted, readings = await queue.get()
+            if readings is None:
+                return
+            try:
+                predictions = await asyncio.to_thread(self.process, readings)
+                self.latencies.append(time.perf_counter() - submitted)
+                if self.on_scores is not None and not predictions.empty:
+                    self.on_scores(predictions)
+            except Exception:
+                logger.exception("Failed to process a telemetry batch")
+
+    def _get_queue(self) -> asyncio.Queue:
+        # Created lazily so it belongs to the loop the service runs on
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._max_pending)
+        return self._queue
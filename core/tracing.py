@@ -0,0 +1,234 @@
+"""Per-stage latency histograms for the app's hot paths.
+
+Stages are timed with spans, e.g.
+
+    with tracing.span("predictions.render_cards"):
+        ...
+
+or with the traced decorator and traced_iter for a generator's time spent
+producing items (Supabase pages, parsed PDF pages, streamed tokens). Each
+stage aggregates into a fixed-bucket histogram, so memory does not grow
+with traffic and p50/p95/p99 are estimated to within one bucket (about
+19%). With TRACING=0 a span is a shared no-op context manager. The
+Performance page shows the histograms; setting METRICS_PORT also serves
+them at /metrics (Prometheus text) and /metrics.json, unauthenticated, on
+METRICS_HOST (loopback unless set). The endpoint is started by the app's
+entry point with start_metrics_server, never on import, so worker
+processes that only record spans don't compete for the port.
+"""
+import bisect
+import contextlib
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING", "1") != "0"
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# Bucket upper bounds in seconds: 0.5 ms to about 2 minutes, four buckets per doubling
+BUCKETS = tuple(0.0005 * 2 ** (i / 4) for i in range(73))
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_NAME = "vehicle_app_stage_seconds"
+
+_NOOP = contextlib.nullcontext()
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their count, sum and maximum."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Interpolates linearly inside the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'start')
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Tracer:
+    """Named stage histograms shared by every session of the process."""
+
+    def __init__(self, enabled: bool = TRACING_ENABLED):
+        self.enabled = enabled
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        return _Span(self, name) if self.enabled else _NOOP
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def traced(self, name: str) -> Callable:
+        """Decorator timing every call of a function as the named stage."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def traced_iter(self, name: str, iterable: Iterable) -> Iterable:
+        """Records the time spent producing iterable's items as one observation once it is exhausted or closed."""
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(name, iterable)
+
+    def _timed_iter(self, name: str, iterable: Iterable) -> Iterator:
+        iterator = iter(iterable)
+        spent = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    spent += time.perf_counter() - start
+                yield item
+        finally:
+            self.observe(name, spent)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """count, sum, mean, max and the QUANTILES of every stage, in seconds."""
+        with self._lock:
+            return {name: {'count': h.count, 'sum': h.sum, 'mean': h.sum / h.count, 'max': h.max,
+                           **{f'p{int(q * 100)}': h.quantile(q) for q in QUANTILES}}
+                    for name, h in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """The stages as a Prometheus summary in the text exposition format."""
+        lines = [f"# HELP {METRIC_NAME} Time spent in each stage of the app.", f"# TYPE {METRIC_NAME} summary"]
+        for name, stats in self.snapshot().items():
+            stage = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines += [f'{METRIC_NAME}{{stage="{stage}",quantile="{q}"}} {stats[f"p{int(q * 100)}"]:.6f}'
+                      for q in QUANTILES]
+            lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {stats["sum"]:.6f}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(tracer: Tracer, port: int, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    """Serves /metrics and /metrics.json from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = tracer.to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = tracer.to_json(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args: Any):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info("Serving stage metrics on %s:%d", host, port)
+    return server
+
+
+_tracer: Optional[Tracer] = None
+_server: Optional[ThreadingHTTPServer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Returns the process-wide tracer."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+    return _tracer
+
+
+def start_metrics_server(port: Optional[str] = METRICS_PORT, host: str = METRICS_HOST
+                         ) -> Optional[ThreadingHTTPServer]:
+    """Serves the process-wide tracer on port if set, once per process; a no-op in child processes."""
+    global _server
+    if not port or multiprocessing.parent_process() is not None:
+        return None
+    tracer = get_tracer()
+    with _tracer_lock:
+        if _server is None:
+            try:
+                _server = serve_metrics(tracer, int(port), host)
+            except OSError:
+                logger.exception("Could not serve metrics on port %s", port)
+    return _server
+
+
+def span(name: str):
+    return get_tracer().span(name)
+
+
+def traced(name: str) -> Callable:
+    return get_tracer().traced(name)
+
+
+def traced_iter(name: str, iterable: Iterable) -> Iterable:
+    return get_tracer().traced_iter(name, iterable)
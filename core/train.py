@@ -0,0 +1,354 @@
+"""Trains the failure-type model from a telemetry export, replacing the notebook.
+
+Reproduces model/predictive maintenance.ipynb with vectorised features and
+labels, searches the notebook's hyperparameter grid across all cores with
+successive halving and early stopping, and writes a versioned artifact
+directory:
+
+    python -m core.train model/fleet_train_imputed.csv --output artifacts
+
+The directory holds the booster as text (model.txt), the per-feature
+scalers (scaler.pkl, same format as the app's), and manifest.json with the
+feature list, classes, parameters and metrics. Point MODEL_PATH at it to
+serve it from the app.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core import dataset
+from core.features import MODEL_FEATURES, assign_priority, compile_scalers
+
+logger = logging.getLogger(__name__)
+
+# Scaled with a MinMaxScaler each, as in the notebook
+FEATURES_TO_NORMALIZE = [
+    'Engine_Load', 'Engine_RPM', 'Engine_Coolant_Temp', 'Vibration',
+    'Mass_Air_Flow_Rate', 'Engine_Oil_Temp', 'Trip_Distance', 'Trip_Time_journey', 'Turbo_Boost_And_Vcm_Gauge'
+]
+RISK_LABELS = {'Overstrain_Risk': 'Overstrain Failure', 'Heat_Dissipation_Risk': 'Heat Dissipation Failure',
+               'Power_Failure_Risk': 'Power Failure'}
+
+PARAM_GRID = {
+    'learning_rate': [0.01, 0.05, 0.1, 0.2],
+    'num_leaves': [15, 31, 50, 100],
+    'max_depth': [-1, 3, 5, 7, 10],
+    'min_data_in_leaf': [10, 20, 30, 50],
+    'lambda_l1': [0, 0.1, 0.5, 1],
+    'lambda_l2': [0, 0.1, 0.5, 1],
+    'feature_fraction': [0.6, 0.7, 0.8, 0.9],
+    'bagging_fraction': [0.6, 0.7, 0.8, 0.9],
+    'bagging_freq': [1, 5, 10],
+}
+N_ITER = 20
+CV_FOLDS = 3
+MAX_ROUNDS = 1000
+EARLY_STOPPING_ROUNDS = 30
+SEED = 42
+
+# Successive halving: 27 configurations at 12 rounds, the best 9 at 36, 3 at 108 and 1 at 324
+HALVING_CANDIDATES = 27
+HALVING_ETA = 3
+HALVING_MIN_ROUNDS = 12
+# min_data_in_leaf varies between configurations, so features must not be pre-filtered on it when binning
+DATASET_PARAMS = {'feature_pre_filter': False, 'verbose': -1}
+
+
+def load_training_data(path: str, filter=None) -> pd.DataFrame:
+    """Reads the model inputs of a CSV/Parquet export or of a core.dataset directory.
+
+    filter (see dataset.make_filter) applies to dataset directories only.
+    """
+    columns = dataset.MODEL_INPUT_COLUMNS
+    if dataset.is_dataset(path):
+        return dataset.load(path, columns, filter)
+    if filter is not None:
+        raise ValueError("Row filters need a dataset directory (see python -m core.dataset)")
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def data_digest(path: str) -> str:
+    """sha256 of a training file, or of every file of a dataset directory in path order."""
+    paths = [path]
+    if dataset.is_dataset(path):
+        paths = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    digest = hashlib.sha256()
+    for file_path in paths:
+        digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(2**20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def fit_scalers(df: pd.DataFrame) -> Dict[str, Any]:
+    from sklearn.preprocessing import MinMaxScaler
+
+    return {feature: MinMaxScaler().fit(df[[feature]]) for feature in FEATURES_TO_NORMALIZE}
+
+
+def failure_labels(features: pd.DataFrame) -> np.ndarray:
+    """The notebook's assign_failure_label for every row at once."""
+    risks = features[list(RISK_LABELS)].to_numpy()
+    names = np.array(list(RISK_LABELS.values()), dtype=object)
+    return np.where(features['Condition_Score'].to_numpy() < 0.3, 'No Failure', names[risks.argmax(axis=1)])
+
+
+def prepare(df: pd.DataFrame, scalers) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Model features (in MODEL_FEATURES order) and failure-type labels of raw telemetry rows."""
+    transform = compile_scalers(scalers, MODEL_FEATURES)
+    features = pd.DataFrame(transform.transform(df), columns=MODEL_FEATURES, index=df.index)
+    return features, failure_labels(features)
+
+
+def base_params(num_class: int) -> Dict[str, Any]:
+    return {'objective': 'multiclass', 'num_class': num_class, 'boosting_type': 'gbdt',
+            'verbose': -1, 'seed': SEED, 'num_threads': 1}
+
+
+# Training data of a worker process, sent once by _init_worker rather than with every task
+_X = _y = None
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray):
+    global _X, _y
+    _X, _y = X, y
+
+
+def _fit_fold(params: Dict[str, Any], train_idx: np.ndarray, valid_idx: np.ndarray) -> Tuple[float, int]:
+    import lightgbm as lgb
+
+    train = lgb.Dataset(_X[train_idx], _y[train_idx])
+    valid = lgb.Dataset(_X[valid_idx], _y[valid_idx], reference=train)
+    booster = lgb.train(params, train, num_boost_round=MAX_ROUNDS, valid_sets=[valid],
+                        callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+    pred = booster.predict(_X[valid_idx], num_iteration=booster.best_iteration).argmax(axis=1)
+    return float((pred == _y[valid_idx]).mean()), booster.best_iteration
+
+
+def search(X: np.ndarray, y: np.ndarray, num_class: int, n_iter: int = N_ITER,
+           workers: int = None) -> Tuple[Dict[str, Any], int, List[Dict[str, Any]]]:
+    """Cross-validates n_iter sampled configurations, every fold of every one in parallel.
+
+    Configurations are drawn like RandomizedSearchCV(random_state=42) draws
+    them, folds are the same StratifiedKFold, and each fit stops early on
+    its validation fold. Returns the best parameters, their mean best
+    iteration and every configuration's result.
+    """
+    from sklearn.model_selection import ParameterSampler, StratifiedKFold
+
+    candidates = list(ParameterSampler(PARAM_GRID, n_iter=n_iter, random_state=SEED))
+    folds = list(StratifiedKFold(n_splits=CV_FOLDS).split(X, y))
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                             initargs=(X, y)) as executor:
+        futures = [[executor.submit(_fit_fold, {**base_params(num_class), **params}, train_idx, valid_idx)
+                    for train_idx, valid_idx in folds] for params in candidates]
+        results = []
+        for params, fold_futures in zip(candidates, futures):
+            scores, iterations = zip(*(future.result() for future in fold_futures))
+            results.append({'params': params, 'cv_accuracy': float(np.mean(scores)),
+                            'best_iteration': int(np.mean(iterations))})
+
+    best = max(results, key=lambda result: result['cv_accuracy'])
+    return best['params'], best['best_iteration'], results
+
+
+# Folds of a halving worker and their binned Datasets, built on first use and reused by every configuration
+_folds = None
+_binned = {}
+
+
+def _init_halving_worker(X: np.ndarray, y: np.ndarray, folds: List[Tuple[np.ndarray, np.ndarray]]):
+    global _folds
+    _init_worker(X, y)
+    _folds = folds
+    _binned.clear()
+
+
+def _binned_fold(fold: int):
+    import lightgbm as lgb
+
+    if fold not in _binned:
+        train_idx, valid_idx = _folds[fold]
+        train = lgb.Dataset(_X[train_idx], _y[train_idx], params=DATASET_PARAMS).construct()
+        valid = lgb.Dataset(_X[valid_idx], _y[valid_idx], reference=train).construct()
+        _binned[fold] = (train, valid)
+    return _binned[fold]
+
+
+def _fit_rung(params: Dict[str, Any], fold: int, rounds: int) -> Tuple[float, float, float, int, bool]:
+    """Trains one fold for at most rounds.
+
+    Returns its validation accuracy, macro-F1 and log-loss at the best
+    iteration, the best iteration, and whether it stopped early.
+    """
+    import lightgbm as lgb
+    from sklearn.metrics import f1_score, log_loss
+
+    train, valid = _binned_fold(fold)
+    booster = lgb.train(params, train, num_boost_round=rounds, valid_sets=[valid],
+                        callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+    valid_idx = _folds[fold][1]
+    prob = booster.predict(_X[valid_idx], num_iteration=booster.best_iteration)
+    pred = prob.argmax(axis=1)
+    return (float((pred == _y[valid_idx]).mean()), float(f1_score(_y[valid_idx], pred, average='macro')),
+            float(log_loss(_y[valid_idx], prob, labels=list(range(prob.shape[1])))),
+            booster.best_iteration, booster.current_iteration() < rounds)
+
+
+def halving_search(X: np.ndarray, y: np.ndarray, num_class: int, n_candidates: int = HALVING_CANDIDATES,
+                   workers: int = None, eta: int = HALVING_ETA, min_rounds: int = HALVING_MIN_ROUNDS
+                   ) -> Tuple[Dict[str, Any], int, List[Dict[str, Any]]]:
+    """Successive halving over sampled configurations, selecting on cross-validated log-loss.
+
+    Every configuration is trained for min_rounds on each fold, the best
+    1/eta go on to eta times as many rounds, and so on until one is left
+    (or MAX_ROUNDS is reached). Log-loss, the early stopping metric, ranks
+    them: macro-F1 hinges on the few Power Failure rows of each fold.
+    Each worker bins a fold's Dataset once and trains every configuration
+    and rung on it. Rungs retrain from scratch rather than resume with
+    init_model, which would rewrite the shared Dataset's init scores; a
+    configuration whose folds all stopped early is kept as is, since more
+    rounds would stop at the same place. Returns like search().
+    """
+    from sklearn.model_selection import ParameterSampler, StratifiedKFold
+
+    candidates = list(ParameterSampler(PARAM_GRID, n_iter=n_candidates, random_state=SEED))
+    folds = list(StratifiedKFold(n_splits=CV_FOLDS).split(X, y))
+    results: List[Dict[str, Any]] = [None] * len(candidates)
+    alive = list(range(len(candidates)))
+    rounds = min_rounds
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_halving_worker,
+                             initargs=(X, y, folds)) as executor:
+        while True:
+            futures = {i: [executor.submit(_fit_rung, {**base_params(num_class), **candidates[i]}, fold, rounds)
+                           for fold in range(len(folds))]
+                       for i in alive if results[i] is None or not results[i]['stopped_early']}
+            for i, fold_futures in futures.items():
+                accuracy, macro_f1, logloss, iterations, stopped = zip(*(future.result() for future in fold_futures))
+                results[i] = {'params': candidates[i], 'cv_accuracy': float(np.mean(accuracy)),
+                              'cv_macro_f1': float(np.mean(macro_f1)), 'cv_logloss': float(np.mean(logloss)),
+                              'best_iteration': int(np.mean(iterations)),
+                              'rounds': rounds, 'stopped_early': all(stopped)}
+            if len(alive) == 1 or rounds >= MAX_ROUNDS:
+                break
+            alive = sorted(alive, key=lambda i: results[i]['cv_logloss'])[:max(1, len(alive) // eta)]
+            rounds = min(rounds * eta, MAX_ROUNDS)
+
+    best = min(results, key=lambda result: result['cv_logloss'])
+    return best['params'], best['best_iteration'], results
+
+
+def evaluate(booster, X: np.ndarray, y: np.ndarray, classes: List[str]) -> Dict[str, Any]:
+    from sklearn.metrics import accuracy_score, classification_report, f1_score
+
+    pred = booster.predict(X).argmax(axis=1)
+    return {'accuracy': float(accuracy_score(y, pred)),
+            'macro_f1': float(f1_score(y, pred, average='macro')),
+            'report': classification_report(y, pred, labels=list(range(len(classes))), target_names=classes,
+                                            output_dict=True, zero_division=0)}
+
+
+def write_artifact(output_dir: str, booster, scalers, classes: List[str], params: Dict[str, Any],
+                   metrics: Dict[str, Any], data_sha256: str) -> str:
+    """Writes model.txt, scaler.pkl and manifest.json to a new versioned directory and returns it."""
+    created = datetime.datetime.now(datetime.timezone.utc)
+    digest = hashlib.sha256(json.dumps([data_sha256, params], sort_keys=True).encode()).hexdigest()
+    version = f"{created:%Y%m%d-%H%M%S}-{digest[:8]}"
+    path = os.path.join(output_dir, version)
+    os.makedirs(path)
+
+    booster.save_model(os.path.join(path, "model.txt"))
+    with open(os.path.join(path, "scaler.pkl"), 'wb') as f:
+        pickle.dump(scalers, f)
+    manifest = {
+        'version': version,
+        'created_at': created.isoformat(),
+        'data_sha256': data_sha256,
+        'features': MODEL_FEATURES,
+        'classes': classes,
+        'params': params,
+        'num_iterations': booster.current_iteration(),
+        'metrics': metrics,
+    }
+    # Written last: its presence marks a complete artifact
+    with open(os.path.join(path, "manifest.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return path
+
+
+SEARCHES = {'halving': (halving_search, HALVING_CANDIDATES), 'random': (search, N_ITER)}
+
+
+def train(data_path: str, output_dir: str = "artifacts", n_iter: int = None, workers: int = None,
+          filter=None, method: str = 'halving') -> str:
+    import lightgbm as lgb
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+
+    df = load_training_data(data_path, filter)
+    scalers = fit_scalers(df)
+    features, labels = prepare(df, scalers)
+    priorities = pd.Series(assign_priority(features['Condition_Score'])).value_counts().to_dict()
+    logger.info("%d rows; failure types %s; priorities %s",
+                len(df), pd.Series(labels).value_counts().to_dict(), priorities)
+
+    encoder = LabelEncoder()
+    y = encoder.fit_transform(labels)
+    classes = encoder.classes_.tolist()
+    xtrain, xtest, ytrain, ytest = train_test_split(features.to_numpy(), y, test_size=0.2, random_state=SEED)
+
+    search_fn, default_n_iter = SEARCHES[method]
+    start = time.perf_counter()
+    params, best_iteration, results = search_fn(xtrain, ytrain, len(classes), n_iter or default_n_iter, workers)
+    search_seconds = time.perf_counter() - start
+    best = next(result for result in results if result['params'] == params)
+    logger.info("Searched %d configurations (%s) in %.1fs; best %s at %d rounds",
+                len(results), method, search_seconds, params, best_iteration)
+
+    final_params = {**base_params(len(classes)), **params, 'num_threads': 0}
+    booster = lgb.train(final_params, lgb.Dataset(xtrain, ytrain, feature_name=MODEL_FEATURES),
+                        num_boost_round=max(best_iteration, 1))
+    metrics = evaluate(booster, xtest, ytest, classes)
+    metrics.update(search=method, search_seconds=search_seconds, configurations=len(results),
+                   **{key: best[key] for key in ('cv_accuracy', 'cv_macro_f1', 'cv_logloss') if key in best})
+    logger.info("Test accuracy %.4f, macro-F1 %.4f", metrics['accuracy'], metrics['macro_f1'])
+    digest = data_digest(data_path)
+    if filter is not None:
+        digest = hashlib.sha256(f"{digest}:{filter}".encode()).hexdigest()
+    return write_artifact(output_dir, booster, scalers, classes, params, metrics, digest)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.train", description=__doc__.splitlines()[0])
+    parser.add_argument("data", help="telemetry export shaped like model/fleet_train_imputed.csv (.csv, .parquet or "
+                                        "a core.dataset directory)")
+    parser.add_argument("--output", default="artifacts", help="directory the versioned artifact is written under")
+    parser.add_argument("--search", choices=sorted(SEARCHES), default='halving',
+                        help="successive halving on cached bins, or the notebook's randomized search")
+    parser.add_argument("--n-iter", type=int,
+                        help=f"hyperparameter configurations to try (default {HALVING_CANDIDATES} halving, "
+                             f"{N_ITER} random)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    dataset.add_filter_arguments(parser)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    path = train(args.data, args.output, args.n_iter, args.workers, dataset.filter_from_args(args), args.search)
+    logger.info("Wrote %s", path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import numpy as np
+from typing import Any, Dict, List
+
+# LightGBM's kZeroThreshold: values this close to zero count as missing for missing_type=Zero
+ZERO_THRESHOLD = 1e-35
+
+COMPACT_EVERY = 4
+
+
+class CompiledBooster:
+    """A LightGBM booster flattened into NumPy arrays and evaluated without LightGBM.
+
+    Internal nodes of every tree come first in the node arrays, followed by the
+    leaves, which point back at themselves. All trees are walked together for
+    all rows for a fixed number of levels (the deepest tree's depth), each level
+    being one gather, one comparison and one child lookup.
+    """
+
+    def __init__(self, model_dump: Dict[str, Any], classes=None):
+        objective = model_dump.get('objective', 'regression').split()
+        self.objective = objective[0]
+        self.objective_params = dict(p.split(':', 1) for p in objective[1:] if ':' in p)
+        self.num_class = int(model_dump.get('num_class', 1))
+        self.trees_per_iteration = int(model_dump.get('num_tree_per_iteration', 1))
+        self.average_output = bool(model_dump.get('average_output', False))
+        self.feature_name_: List[str] = list(model_dump['feature_names'])
+        self.classes_ = np.asarray(classes) if classes is not None else np.arange(max(self.num_class, 2))
+
+        internal: List[Dict[str, Any]] = []
+        leaf_value: List[float] = []
+        depth = [0]
+
+        # Leaves get negative ids while flattening and are renumbered after the internal nodes
+        def add(node, level) -> int:
+            depth[0] = max(depth[0], level)
+            if 'leaf_value' in node:
+                leaf_value.append(node['leaf_value'])
+                return ~(len(leaf_value) - 1)
+            if node.get('decision_type', '<=') != '<=':
+                raise NotImplementedError("Categorical splits are not supported by CompiledBooster")
+            index = len(internal)
+            entry = dict(node)
+            internal.append(entry)
+            entry['left'] = add(node['left_child'], level + 1)
+            entry['right'] = add(node['right_child'], level + 1)
+            return index
+
+        roots = []
+        for tree in model_dump['tree_info']:
+            if tree.get('is_linear'):
+                raise NotImplementedError("Linear trees are not supported by CompiledBooster")
+            roots.append(add(tree['tree_structure'], 0))
+
+        n_internal, n_leaves = len(internal), len(leaf_value)
+        renumber = lambda i: i if i >= 0 else n_internal + ~i
+        n_nodes = n_internal + n_leaves
+
+        self.n_internal = n_internal
+        self.depth = depth[0]
+        self.roots = np.asarray([renumber(r) for r in roots], dtype=np.intp)
+        self.leaf_value = np.asarray(leaf_value, dtype=np.float64)
+        self.feature = np.zeros(n_nodes, dtype=np.intp)
+        self.threshold = np.zeros(n_nodes, dtype=np.float64)
+        self.default_left = np.zeros(n_nodes, dtype=bool)
+        self.nan_left = np.zeros(n_nodes, dtype=bool)
+        self.zero_missing = np.zeros(n_nodes, dtype=bool)
+        # children[2 * node] is the right child, children[2 * node + 1] the left one
+        self.children = np.repeat(np.arange(n_nodes, dtype=np.intp), 2)
+
+        for i, node in enumerate(internal):
+            missing_type = node['missing_type']
+            self.feature[i] = node['split_feature']
+            self.threshold[i] = node['threshold']
+            self.default_left[i] = node['default_left']
+            # With missing_type None LightGBM reads NaN as 0.0; otherwise NaN takes the default branch
+            self.nan_left[i] = node['default_left'] if missing_type != 'None' else 0.0 <= node['threshold']
+            self.zero_missing[i] = missing_type == 'Zero'
+            self.children[2 * i] = renumber(node['right'])
+            self.children[2 * i + 1] = renumber(node['left'])
+        self.has_zero_missing = bool(self.zero_missing.any())
+
+    @classmethod
+    def from_booster(cls, booster, classes=None) -> "CompiledBooster":
+        return cls(booster.dump_model(), classes=classes)
+
+    @classmethod
+    def from_model(cls, model) -> "CompiledBooster":
+        """Builds the evaluator from an LGBMClassifier, an LGBMModel wrapper or a raw Booster."""
+        booster = getattr(model, '_Booster', None)
+        if booster is None:
+            booster = model
+        return cls.from_booster(booster, classes=getattr(model, '_classes', None))
+
+    def leaf_indices(self, X: np.ndarray) -> np.ndarray:
+        """Returns the leaf index reached by each row in each tree, shape (rows, trees)."""
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        flat = X.ravel()
+        offsets = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, n_trees)
+        node = np.tile(self.roots, n_rows)
+        has_nan = bool(np.isnan(flat).any())
+
+        # Tree depths vary a lot, so rows that already reached a leaf are dropped every few levels
+        active = np.arange(node.size)
+        for level in range(self.depth):
+            if level and level % COMPACT_EVERY == 0:
+                active = active[node[active] < self.n_internal]
+                if not active.size:
+                    break
+            current = node[active]
+            value = flat[offsets[active] + self.feature[current]]
+            go_left = value <= self.threshold[current]
+            if has_nan:
+                go_left = np.where(np.isnan(value), self.nan_left[current], go_left)
+            if self.has_zero_missing:
+                is_zero = self.zero_missing[current] & (np.abs(value) <= ZERO_THRESHOLD)
+                go_left = np.where(is_zero, self.default_left[current], go_left)
+            node[active] = self.children[2 * current + go_left]
+
+        return (node - self.n_internal).reshape(n_rows, n_trees)
+
+    def raw_score(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        values = self.leaf_value[self.leaf_indices(X)]
+        k = self.trees_per_iteration
+        scores = values.reshape(X.shape[0], -1, k).sum(axis=1)
+        if self.average_output:
+            scores /= values.shape[1] // k
+        return scores
+
+    def predict_proba(self, X) -> np.ndarray:
+        scores = self.raw_score(X)
+        if self.objective == 'multiclass':
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+            return scores / scores.sum(axis=1, keepdims=True)
+        if self.objective in ('binary', 'multiclassova'):
+            sigmoid = float(self.objective_params.get('sigmoid', 1.0))
+            proba = 1.0 / (1.0 + np.exp(-sigmoid * scores))
+            if self.objective == 'binary':
+                return np.hstack([1.0 - proba, proba])
+            return proba
+        return scores
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
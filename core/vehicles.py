@@ -0,0 +1,168 @@
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Columns of the vehicles table the pages and the model actually use
+VIEW_COLUMNS = ["vehicle_id", "brand", "model_name", "last_serviced_date"]
+TELEMETRY_COLUMNS = [
+    "vehicle_speed_sensor", "vibration", "engine_load", "engine_coolant_temp", "engine_rpm",
+    "mass_air_flow_rate", "engine_oil_temp", "speed_gps", "turbo_boost_and_vcm_gauge",
+    "trip_distance", "litres_per_100km_inst", "co2_in_g_per_km_inst", "trip_time_journey",
+]
+FLEET_COLUMNS = VIEW_COLUMNS + ["last_modified", *TELEMETRY_COLUMNS, "manual_link", "score", "region"]
+# Batch jobs work across users, so they also need the owner and the primary key
+BATCH_COLUMNS = ["id", "user_id", *FLEET_COLUMNS]
+
+# Rows per PostgREST request; below PostgREST's default max-rows of 1000
+PAGE_SIZE = 500
+UPSERT_BATCH_SIZE = 500
+# Attempts per write and the first backoff; the delay doubles (with jitter) after each failure
+RETRY_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 0.5
+
+# Safety net for writes made outside this process (e.g. another app instance)
+CACHE_TTL_SECONDS = 300
+# Upper bound on rows held by the page cache across all users
+CACHE_MAX_ROWS = 10_000
+
+_cache: "OrderedDict[Tuple, Tuple[float, pd.DataFrame]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cached(key: Tuple, load) -> pd.DataFrame:
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < CACHE_TTL_SECONDS:
+            _cache.move_to_end(key)
+            return cached[1].copy()
+
+    df = load()
+    with _lock:
+        _cache[key] = (time.monotonic(), df)
+        cached_rows = sum(len(entry[1]) for entry in _cache.values())
+        while cached_rows > CACHE_MAX_ROWS and len(_cache) > 1:
+            _, (_, evicted) = _cache.popitem(last=False)
+            cached_rows -= len(evicted)
+    return df.copy()
+
+
+def fetch_page(supabase, user_id: str, after: Optional[str] = None, limit: int = PAGE_SIZE,
+               columns: List[str] = FLEET_COLUMNS) -> pd.DataFrame:
+    """Returns up to limit vehicles of a user ordered by vehicle_id, starting after the given id.
+
+    Keyset pagination: the cursor is the last vehicle_id of the previous page,
+    so every page costs the same no matter how deep into the fleet it is.
+    vehicle_id is expected to be unique per user.
+    """
+    def load():
+        query = supabase.table("vehicles") \
+                        .select(",".join(columns)) \
+                        .eq("user_id", user_id)
+        if after is not None:
+            query = query.gt("vehicle_id", after)
+        response = query.order("vehicle_id").limit(limit).execute()
+        return pd.DataFrame(response.data, columns=columns)
+
+    return _cached((user_id, "page", after, limit, tuple(columns)), load)
+
+
+def iter_pages(supabase, user_id: str, page_size: int = PAGE_SIZE,
+               columns: List[str] = FLEET_COLUMNS) -> Iterator[pd.DataFrame]:
+    """Yields the fleet of a user one keyset page at a time."""
+    after = None
+    while True:
+        page = fetch_page(supabase, user_id, after=after, limit=page_size, columns=columns)
+        if page.empty:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        after = page["vehicle_id"].iloc[-1]
+
+
+def fetch_fleet(supabase, user_id: str, columns: List[str] = FLEET_COLUMNS) -> pd.DataFrame:
+    """Returns all vehicles of a user, assembled from cached pages."""
+    pages = list(iter_pages(supabase, user_id, columns=columns))
+    if not pages:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(pages, ignore_index=True)
+
+
+def iter_all_pages(supabase, user_id: Optional[str] = None, page_size: int = PAGE_SIZE,
+                   columns: List[str] = BATCH_COLUMNS) -> Iterator[pd.DataFrame]:
+    """Yields every vehicle (optionally of one user) keyset-paged on the id primary key.
+
+    Meant for batch jobs, so pages bypass the cache; columns must include "id".
+    """
+    after = None
+    while True:
+        query = supabase.table("vehicles").select(",".join(columns))
+        if user_id is not None:
+            query = query.eq("user_id", user_id)
+        if after is not None:
+            query = query.gt("id", after)
+        page = pd.DataFrame(query.order("id").limit(page_size).execute().data, columns=columns)
+        if page.empty:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        after = int(page["id"].iloc[-1])
+
+
+def get_vehicle(supabase, user_id: str, vehicle_id: str) -> Optional[Dict[str, Any]]:
+    """Looks up one vehicle of the user."""
+    def load():
+        response = supabase.table("vehicles") \
+                           .select(",".join(FLEET_COLUMNS)) \
+                           .eq("user_id", user_id) \
+                           .eq("vehicle_id", vehicle_id) \
+                           .limit(1) \
+                           .execute()
+        return pd.DataFrame(response.data, columns=FLEET_COLUMNS)
+
+    df = _cached((user_id, "vehicle", vehicle_id), load)
+    if df.empty:
+        return None
+    row = df.iloc[0].astype(object)
+    return row.where(row.notna(), None).to_dict()
+
+
+def with_retry(fn: Callable[[], Any], attempts: int = RETRY_ATTEMPTS, base_delay: float = RETRY_BASE_SECONDS):
+    """Calls fn until it succeeds, backing off exponentially; re-raises the last error.
+
+    Only for idempotent writes such as upserts, which are safe to repeat
+    when a response was lost.
+    """
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            delay = base_delay * 2 ** attempt * (0.5 + random.random())
+            logger.warning("Supabase write failed (%s), retrying in %.1fs", e, delay)
+            time.sleep(delay)
+
+
+def upsert_rows(supabase, rows: List[Dict[str, Any]], on_conflict: str,
+                batch_size: int = UPSERT_BATCH_SIZE) -> int:
+    """Upserts rows into the vehicles table in batches, retrying each batch; returns the rows written."""
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        with_retry(lambda: supabase.table("vehicles").upsert(batch, on_conflict=on_conflict).execute())
+    return len(rows)
+
+
+def invalidate(user_id: str):
+    """Drops everything cached for a user; call after every write to the vehicles table."""
+    with _lock:
+        for key in [key for key in _cache if key[0] == user_id]:
+            del _cache[key]